@@ -1,5 +1,5 @@
-from django.db import models
-from django.db.models import Max
+from django.db import models, transaction
+from django.db.models import Case, F, Max, Value, When
 
 from django.conf import settings
 
@@ -7,12 +7,63 @@ import uuid
 
 
 class AboutUsManager(models.Manager):
-    def reorder_indexes(self):
-        # Reorder the indexes based on the created_at field
-        for i, obj in enumerate(self.all().order_by("created_at")):
-            if obj.index != i:
-                obj.index = i
-                super(AboutUs, obj).save(update_fields=["index"])
+    # Rewritten indexes are parked this far up first, so that no row ever
+    # collides with another on the unique index mid-statement
+    INDEX_OFFSET = 1 << 30
+
+    def _rewrite_indexes(self, queryset, new_index):
+        # Two set-based UPDATEs whatever the number of rows, only the rows of
+        # queryset are touched
+        with transaction.atomic():
+            queryset.update(index=new_index + self.INDEX_OFFSET)
+            self.filter(index__gte=self.INDEX_OFFSET).update(
+                index=F("index") - self.INDEX_OFFSET
+            )
+
+    def close_gaps(self, indexes):
+        # Shift the rows after the deleted indexes down to keep them 0..n-1,
+        # each by the number of deleted indexes below it
+        indexes = sorted(set(indexes))
+        if not indexes:
+            return
+        bounds = zip(indexes, indexes[1:] + [None])
+        shifts = [
+            When(
+                index__gt=low,
+                **({} if high is None else {"index__lt": high}),
+                then=F("index") - shift,
+            )
+            for shift, (low, high) in enumerate(bounds, start=1)
+        ]
+        self._rewrite_indexes(
+            self.filter(index__gt=indexes[0]),
+            Case(*shifts, default=F("index"), output_field=models.PositiveIntegerField()),
+        )
+
+    def reorder(self, ids):
+        """
+        Put the given entries in the given order, in the index slots they
+        already occupy, and return the number of rows that moved.
+        """
+        ids = [self.model._meta.pk.to_python(pk) for pk in ids]
+        current = dict(self.filter(pk__in=ids).values_list("pk", "index"))
+        moves = {
+            pk: index
+            for pk, index in zip(
+                [pk for pk in dict.fromkeys(ids) if pk in current],
+                sorted(current.values()),
+            )
+            if current[pk] != index
+        }
+        if moves:
+            self._rewrite_indexes(
+                self.filter(pk__in=moves),
+                Case(
+                    *[When(pk=pk, then=Value(index)) for pk, index in moves.items()],
+                    output_field=models.PositiveIntegerField(),
+                ),
+            )
+        return len(moves)
 
 
 class AboutUs(models.Model):
@@ -53,16 +104,16 @@ class AboutUs(models.Model):
 
     def save(self, *args, **kwargs):
         if self.index is None:
+            # New entries go last, a lookup on the unique index
             max_index = AboutUs.objects.aggregate(Max("index"))["index__max"]
             self.index = 0 if max_index is None else max_index + 1
         super().save(*args, **kwargs)
-        # Reorder indexes after saving
-        AboutUs.objects.reorder_indexes()
 
     def delete(self, *args, **kwargs):
-        super().delete(*args, **kwargs)
-        # Reorder indexes after deletion
-        AboutUs.objects.reorder_indexes()
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            AboutUs.objects.close_gaps([self.index])
+        return deleted
 
     class Meta:
-        ordering = ["created_at"]
+        ordering = ["index"]
@@ -5,6 +5,7 @@ from apps.about_us.views import (
     AboutUsRetrieveView,
     AboutUsUpdateView,
     AboutUsDeleteView,
+    AboutUsReorderView,
     UploadFileView,
     DownloadFileView,get_pdf_file_names,
 )
@@ -16,6 +17,7 @@ urlpatterns = [
     path("aboutUs_retrieve/", AboutUsRetrieveView.as_view(), name="aboutUs_retrieve"),
     path("aboutUs_update/", AboutUsUpdateView.as_view(), name="aboutUs_update"),
     path("aboutUs_delete/", AboutUsDeleteView.as_view(), name="aboutUs_delete"),
+    path("aboutUs_reorder/", AboutUsReorderView.as_view(), name="aboutUs_reorder"),
     path("upload_pdf_file/", UploadFileView.as_view(), name="upload-file"),
     path("download_file/", DownloadFileView.as_view(), name="download-file"),
     path('pdf_files_names/',get_pdf_file_names, name='pdf_files_names'),
@@ -3,6 +3,7 @@ import os
 from django.utils.translation import gettext_lazy as _
 from django.shortcuts import get_object_or_404
 from django.http import FileResponse, HttpResponse, JsonResponse
+from django.db import transaction
 
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -13,7 +14,7 @@ from rest_framework import (
     status,
 )
 
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from music_sheet.authentication import JWTAuthentication
 
 from apps.about_us.models import AboutUs
 from apps.about_us.serializers import AboutUsSerializer
@@ -53,7 +54,7 @@ class AboutUsListView(generics.ListAPIView):
     serializer_class = AboutUsSerializer
 
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset().order_by('created_at')[:1]  # Apply ordering before slicing
+        queryset = self.get_queryset().order_by('index')[:1]  # Apply ordering before slicing
         serializer = self.get_serializer(queryset.first())
         return Response(serializer.data)
 
@@ -100,9 +101,18 @@ class AboutUsDeleteView(generics.DestroyAPIView):
 
     def delete(self, request, *args, **kwargs):
         aboutUs_ids = request.data.get("aboutUs_id", [])
-        for aboutUs_id in aboutUs_ids:
-            instance = get_object_or_404(AboutUs, id=aboutUs_id)
-            instance.delete()
+        with transaction.atomic():
+            indexes = dict(
+                AboutUs.objects.filter(id__in=aboutUs_ids).values_list("id", "index")
+            )
+            if len(indexes) != len(set(map(str, aboutUs_ids))):
+                return Response(
+                    {"detail": _("AboutUs not found")},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            # One DELETE and one renumbering of the rows after the first gap
+            AboutUs.objects.filter(id__in=indexes).delete()
+            AboutUs.objects.close_gaps(indexes.values())
 
         return Response(
             {"detail": _("AboutUs permanently deleted successfully")},
@@ -110,6 +120,29 @@ class AboutUsDeleteView(generics.DestroyAPIView):
         )
 
 
+class AboutUsReorderView(generics.GenericAPIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [CustomerPermission]
+
+    def post(self, request, *args, **kwargs):
+        # The entries are put in the given order in the slots they occupy,
+        # only the ones whose index changes are written
+        aboutUs_ids = request.data.get("aboutUs_id", [])
+        with transaction.atomic():
+            found = AboutUs.objects.filter(id__in=aboutUs_ids).count()
+            if not aboutUs_ids or found != len(set(map(str, aboutUs_ids))):
+                return Response(
+                    {"detail": _("AboutUs not found")},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            moved = AboutUs.objects.reorder(aboutUs_ids)
+
+        return Response(
+            {"detail": _("AboutUs reordered successfully"), "moved": moved},
+            status=status.HTTP_200_OK,
+        )
+
+
 class DownloadFileView(APIView):
     def get(self, request):
 
@@ -0,0 +1,121 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from apps.analytics.models import DashboardStats
+from apps.contact_us.models import ContactUs
+from apps.customer.models import Customer
+from apps.order.models import Order
+from apps.product.models import Product
+
+
+DASHBOARD_STATS_ID = 1
+
+
+# Each tracked model maps the values of a row to the counters it adds to
+
+
+def product_counters(values):
+    deleted = values["is_deleted"]
+    return {
+        "products": int(not deleted),
+        "active_products": int(values["is_active"] and not deleted),
+        "deleted_products": int(deleted),
+    }
+
+
+def customer_counters(values):
+    return {"customers": int(values["is_customer"] and not values["is_deleted"])}
+
+
+def order_counters(values):
+    payment_status = values["payment_status"]
+    return {
+        "pending_orders": int(payment_status == "Pending"),
+        "complete_orders": int(payment_status == "Complete"),
+        "failed_orders": int(payment_status == "Failed"),
+        "revenue": (
+            values["final_total"] or Decimal("0.00")
+            if payment_status == "Complete"
+            else Decimal("0.00")
+        ),
+    }
+
+
+def contact_counters(values):
+    return {"contact_messages": 1, "unread_contact_messages": int(not values["is_read"])}
+
+
+TRACKED_MODELS = {
+    Product: (("is_active", "is_deleted"), product_counters),
+    Customer: (("is_customer", "is_deleted"), customer_counters),
+    Order: (("payment_status", "final_total"), order_counters),
+    ContactUs: (("is_read",), contact_counters),
+}
+
+
+def counters_delta(old, new):
+    # Counter changes between two snapshots, either of which may be None
+    old, new = old or {}, new or {}
+    delta = {}
+    for name in old.keys() | new.keys():
+        change = new.get(name, 0) - old.get(name, 0)
+        if change:
+            delta[name] = change
+    return delta
+
+
+def apply_dashboard_delta(delta):
+    """
+    Add a counter delta to the dashboard once the current transaction
+    commits, so the single stats row is never locked for a whole checkout.
+    """
+    if not delta:
+        return
+
+    def apply():
+        updated = DashboardStats.objects.filter(pk=DASHBOARD_STATS_ID).update(
+            **{name: F(name) + change for name, change in delta.items()}
+        )
+        if not updated:
+            # First use, count everything instead
+            reconcile_dashboard_stats()
+
+    transaction.on_commit(apply)
+
+
+def reconcile_dashboard_stats():
+    # Recounts every counter from the source tables and overwrites the row
+    counters = Product.objects.aggregate(
+        products=Count("id", filter=Q(is_deleted=False)),
+        active_products=Count("id", filter=Q(is_deleted=False, is_active=True)),
+        deleted_products=Count("id", filter=Q(is_deleted=True)),
+    )
+    counters.update(
+        Customer.objects.aggregate(
+            customers=Count("pk", filter=Q(is_deleted=False, is_customer=True))
+        )
+    )
+    counters.update(
+        Order.objects.aggregate(
+            pending_orders=Count("id", filter=Q(payment_status="Pending")),
+            complete_orders=Count("id", filter=Q(payment_status="Complete")),
+            failed_orders=Count("id", filter=Q(payment_status="Failed")),
+            revenue=Sum("final_total", filter=Q(payment_status="Complete")),
+        )
+    )
+    counters.update(
+        ContactUs.objects.aggregate(
+            contact_messages=Count("id"),
+            unread_contact_messages=Count("id", filter=Q(is_read=False)),
+        )
+    )
+    counters["revenue"] = counters["revenue"] or Decimal("0.00")
+
+    stats, _ = DashboardStats.objects.update_or_create(
+        pk=DASHBOARD_STATS_ID,
+        defaults={**counters, "reconciled_at": timezone.now()},
+    )
+    return stats
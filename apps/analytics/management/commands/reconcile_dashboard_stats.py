@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.analytics.dashboard import reconcile_dashboard_stats
+
+
+class Command(BaseCommand):
+    help = "Recount the admin dashboard counters to correct any drift."
+
+    def handle(self, *args, **options):
+        reconcile_dashboard_stats()
+        self.stdout.write(self.style.SUCCESS("Dashboard stats reconciled."))
@@ -0,0 +1,65 @@
+from django.db import models
+
+from apps.category.models import Category
+from apps.product.models import Product
+
+
+# Daily sales rollups, kept up to date by every completed checkout and
+# rebuilt from the orders with the rebuild_sales_rollups command
+
+
+class DailySales(models.Model):
+    date = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveBigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+
+class DailyProductSales(models.Model):
+    PURCHASE_CHOICES = [("pdf", ("PDF")), ("sib", ("SIBELIUS"))]
+
+    date = models.DateField()
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="daily_sales",
+    )
+    purchase_type = models.CharField(max_length=8, choices=PURCHASE_CHOICES)
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveBigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ("date", "product", "purchase_type")
+
+
+class DailyCategorySales(models.Model):
+    date = models.DateField()
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name="daily_sales",
+    )
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveBigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ("date", "category")
+
+
+class DashboardStats(models.Model):
+    # Single row of admin dashboard counters, kept current by signals and
+    # corrected by the reconcile_dashboard_stats command
+    products = models.PositiveIntegerField(default=0)
+    active_products = models.PositiveIntegerField(default=0)
+    deleted_products = models.PositiveIntegerField(default=0)
+    customers = models.PositiveIntegerField(default=0)
+    pending_orders = models.PositiveIntegerField(default=0)
+    complete_orders = models.PositiveIntegerField(default=0)
+    failed_orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    contact_messages = models.PositiveIntegerField(default=0)
+    unread_contact_messages = models.PositiveIntegerField(default=0)
+    reconciled_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,143 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.analytics.models import DailyCategorySales, DailyProductSales, DailySales
+from apps.order.models import OrderItems
+from apps.product.models import Product
+
+
+ROLLUP_MODELS = (DailySales, DailyProductSales, DailyCategorySales)
+
+
+def _add_to_rollup(model, date, key_fields, totals):
+    """
+    Add order totals to one rollup table in two queries.
+
+    totals maps a tuple of key field values to (orders, units, revenue).
+    Missing rows are inserted first, then every row is incremented by a
+    single UPDATE so concurrent checkouts never overwrite each other.
+    """
+    if not totals:
+        return
+
+    model.objects.bulk_create(
+        [model(date=date, **dict(zip(key_fields, key))) for key in totals],
+        ignore_conflicts=True,
+    )
+
+    conditions = {
+        key: Q(date=date, **dict(zip(key_fields, key))) for key in totals
+    }
+
+    def increment(index, output_field):
+        return Case(
+            *[
+                When(conditions[key], then=Value(values[index]))
+                for key, values in totals.items()
+            ],
+            default=Value(0),
+            output_field=output_field,
+        )
+
+    rows = Q()
+    for condition in conditions.values():
+        rows |= condition
+    model.objects.filter(rows).update(
+        orders=F("orders") + increment(0, models.PositiveIntegerField()),
+        units=F("units") + increment(1, models.PositiveBigIntegerField()),
+        revenue=F("revenue")
+        + increment(2, models.DecimalField(max_digits=14, decimal_places=2)),
+    )
+
+
+def record_order_sales(order, order_items):
+    # Adds a completed order to the rollups of the day it was placed on
+    date = timezone.localdate(order.created_at)
+
+    product_totals = defaultdict(lambda: [1, 0, Decimal("0.00")])
+    for item in order_items:
+        totals = product_totals[(item.product_id, item.purchase_type)]
+        totals[1] += item.quantity
+        totals[2] += item.sub_total
+
+    order_totals = [1, 0, Decimal("0.00")]
+    totals_by_product = defaultdict(lambda: [0, Decimal("0.00")])
+    for (product_id, _), (_, units, revenue) in product_totals.items():
+        order_totals[1] += units
+        order_totals[2] += revenue
+        totals_by_product[product_id][0] += units
+        totals_by_product[product_id][1] += revenue
+
+    # A product in several categories counts towards each of them
+    category_totals = defaultdict(lambda: [1, 0, Decimal("0.00")])
+    product_categories = Product.category.through.objects.filter(
+        product_id__in=totals_by_product
+    ).values_list("product_id", "category_id")
+    for product_id, category_id in product_categories:
+        units, revenue = totals_by_product[product_id]
+        category_totals[(category_id,)][1] += units
+        category_totals[(category_id,)][2] += revenue
+
+    _add_to_rollup(DailySales, date, (), {(): order_totals})
+    _add_to_rollup(
+        DailyProductSales, date, ("product_id", "purchase_type"), product_totals
+    )
+    _add_to_rollup(DailyCategorySales, date, ("category_id",), category_totals)
+
+
+def rebuild_sales_rollups(start=None, end=None):
+    """
+    Recompute the rollups from the completed orders, optionally only for
+    the days between start and end (both inclusive).
+    """
+    items = OrderItems.objects.filter(order__payment_status="Complete").annotate(
+        date=TruncDate("order__created_at")
+    )
+    if start:
+        items = items.filter(date__gte=start)
+    if end:
+        items = items.filter(date__lte=end)
+
+    totals = {
+        "orders": Count("order", distinct=True),
+        "units": Sum("quantity"),
+        "revenue": Sum("sub_total"),
+    }
+
+    with transaction.atomic():
+        for model in ROLLUP_MODELS:
+            rollups = model.objects.all()
+            if start:
+                rollups = rollups.filter(date__gte=start)
+            if end:
+                rollups = rollups.filter(date__lte=end)
+            rollups.delete()
+
+        DailySales.objects.bulk_create(
+            [DailySales(**row) for row in items.values("date").annotate(**totals)],
+            batch_size=1000,
+        )
+        DailyProductSales.objects.bulk_create(
+            [
+                DailyProductSales(**row)
+                for row in items.values("date", "product_id", "purchase_type").annotate(
+                    **totals
+                )
+            ],
+            batch_size=1000,
+        )
+        DailyCategorySales.objects.bulk_create(
+            [
+                DailyCategorySales(**row)
+                for row in items.filter(product__category__isnull=False)
+                .annotate(category_id=F("product__category"))
+                .values("date", "category_id")
+                .annotate(**totals)
+            ],
+            batch_size=1000,
+        )
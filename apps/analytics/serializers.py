@@ -0,0 +1,34 @@
+from rest_framework import serializers
+
+from apps.analytics.models import DailySales, DashboardStats
+
+
+class DailySalesSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DailySales
+        fields = ["date", "orders", "units", "revenue"]
+
+
+class ProductSalesReportSerializer(serializers.Serializer):
+    product = serializers.UUIDField()
+    product_name = serializers.CharField(source="product__name")
+    product_name_ar = serializers.CharField(source="product__name_ar")
+    purchase_type = serializers.CharField()
+    orders = serializers.IntegerField()
+    units = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class CategorySalesReportSerializer(serializers.Serializer):
+    category = serializers.UUIDField()
+    category_name = serializers.CharField(source="category__name")
+    category_name_ar = serializers.CharField(source="category__name_ar")
+    orders = serializers.IntegerField()
+    units = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class DashboardStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DashboardStats
+        exclude = ["id"]
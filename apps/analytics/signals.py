@@ -0,0 +1,120 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.analytics.dashboard import (
+    TRACKED_MODELS,
+    apply_dashboard_delta,
+    counters_delta,
+    customer_counters,
+)
+from apps.customer.models import Customer
+from user.models import User
+
+
+def current_values(instance, fields):
+    return {field: getattr(instance, field) for field in fields}
+
+
+def loaded_values(instance, fields):
+    # Values of fields as loaded, None if any of them was deferred
+    if all(field in instance.__dict__ for field in fields):
+        return current_values(instance, fields)
+    return None
+
+
+def remember_loaded_counters(sender, instance, **kwargs):
+    # What the row held when it was read, so saves need not read it again
+    fields, counters = TRACKED_MODELS[sender]
+    instance._dashboard_loaded = loaded_values(instance, fields)
+
+
+def remember_dashboard_counters(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    # Counters of the stored row before it is overwritten
+    fields, counters = TRACKED_MODELS[sender]
+    instance._dashboard_counters = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not set(update_fields) & set(fields):
+        return
+    stored = getattr(instance, "_dashboard_loaded", None)
+    if stored is None:
+        stored = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    if stored is not None:
+        instance._dashboard_counters = counters(stored)
+
+
+def update_dashboard_counters(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    if raw:
+        return
+    fields, counters = TRACKED_MODELS[sender]
+    previous = getattr(instance, "_dashboard_counters", None)
+    if not created and previous is None:
+        # None of the tracked fields was written
+        return
+    values = current_values(instance, fields)
+    apply_dashboard_delta(counters_delta(previous, counters(values)))
+    # The next save of this instance starts from what was just written
+    instance._dashboard_loaded = values
+
+
+def remove_dashboard_counters(sender, instance, **kwargs):
+    fields, counters = TRACKED_MODELS[sender]
+    apply_dashboard_delta(
+        counters_delta(counters(current_values(instance, fields)), None)
+    )
+
+
+for tracked_model in TRACKED_MODELS:
+    post_init.connect(remember_loaded_counters, sender=tracked_model)
+    pre_save.connect(remember_dashboard_counters, sender=tracked_model)
+    post_save.connect(update_dashboard_counters, sender=tracked_model)
+    post_delete.connect(remove_dashboard_counters, sender=tracked_model)
+
+
+# Customers are also soft deleted and restored through the user endpoints,
+# which save the parent User row only. Only is_deleted matters there, the
+# customer row is read when it changed.
+
+
+@receiver(post_init, sender=User)
+def remember_loaded_user_deleted(sender, instance, **kwargs):
+    instance._dashboard_is_deleted = instance.__dict__.get("is_deleted")
+
+
+@receiver(pre_save, sender=User)
+def remember_customer_user_counters(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    instance._dashboard_customer = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and "is_deleted" not in update_fields:
+        return
+    if getattr(instance, "_dashboard_is_deleted", None) == instance.is_deleted:
+        return
+    instance._dashboard_customer = (
+        Customer.objects.filter(pk=instance.pk)
+        .values("is_customer", "is_deleted")
+        .first()
+    )
+
+
+@receiver(post_save, sender=User)
+def update_customer_user_counters(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    if update_fields is None or "is_deleted" in update_fields:
+        instance._dashboard_is_deleted = instance.is_deleted
+    stored = getattr(instance, "_dashboard_customer", None)
+    if raw or stored is None:
+        return
+    apply_dashboard_delta(
+        counters_delta(
+            customer_counters(stored),
+            customer_counters({**stored, "is_deleted": instance.is_deleted}),
+        )
+    )
@@ -0,0 +1,22 @@
+from django.urls import path
+from apps.analytics.views import (
+    SalesReportView,
+    ProductSalesReportView,
+    CategorySalesReportView,
+    DashboardStatsView,
+)
+
+urlpatterns = [
+    path("sales_report/", SalesReportView.as_view(), name="sales-report"),
+    path(
+        "product_sales_report/",
+        ProductSalesReportView.as_view(),
+        name="product-sales-report",
+    ),
+    path(
+        "category_sales_report/",
+        CategorySalesReportView.as_view(),
+        name="category-sales-report",
+    ),
+    path("dashboard_stats/", DashboardStatsView.as_view(), name="dashboard-stats"),
+]
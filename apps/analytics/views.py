@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import generics
+from rest_framework.exceptions import ParseError
+from rest_framework.response import Response
+from music_sheet.authentication import JWTAuthentication
+
+from apps.analytics.dashboard import DASHBOARD_STATS_ID, reconcile_dashboard_stats
+from apps.analytics.models import (
+    DailyCategorySales,
+    DailyProductSales,
+    DailySales,
+    DashboardStats,
+)
+from apps.analytics.serializers import (
+    DashboardStatsSerializer,
+    DailySalesSerializer,
+    ProductSalesReportSerializer,
+    CategorySalesReportSerializer,
+)
+
+from music_sheet.pagination import StandardResultsSetPagination
+from music_sheet.custom_permissions import CustomerPermission
+
+
+# Number of days reported when no start date is given
+DEFAULT_REPORT_DAYS = 30
+
+
+class SalesReportMixin:
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [CustomerPermission]
+
+    def get_date_range(self):
+        # start and end are inclusive ISO dates, defaulting to the last 30 days
+        try:
+            end = parse_date(self.request.query_params.get("end", "")) or (
+                timezone.localdate()
+            )
+            start = parse_date(self.request.query_params.get("start", "")) or (
+                end - timedelta(days=DEFAULT_REPORT_DAYS - 1)
+            )
+        except ValueError:
+            raise ParseError(_("Dates must be valid and formatted as YYYY-MM-DD."))
+        if start > end:
+            raise ParseError(_("The start date must not be after the end date."))
+        return start, end
+
+    def get_totals(self, queryset):
+        return queryset.aggregate(
+            orders=Sum("orders"), units=Sum("units"), revenue=Sum("revenue")
+        )
+
+
+class SalesReportView(SalesReportMixin, generics.GenericAPIView):
+    serializer_class = DailySalesSerializer
+
+    def get(self, request, *args, **kwargs):
+        start, end = self.get_date_range()
+        days = DailySales.objects.filter(date__range=(start, end)).order_by("date")
+        return Response(
+            {
+                "start": start,
+                "end": end,
+                "totals": self.get_totals(days),
+                "days": self.get_serializer(days, many=True).data,
+            }
+        )
+
+
+class ProductSalesReportView(SalesReportMixin, generics.ListAPIView):
+    serializer_class = ProductSalesReportSerializer
+    pagination_class = StandardResultsSetPagination
+
+    def get_queryset(self):
+        start, end = self.get_date_range()
+        queryset = DailyProductSales.objects.filter(date__range=(start, end))
+        purchase_type = self.request.query_params.get("purchase_type")
+        if purchase_type:
+            queryset = queryset.filter(purchase_type=purchase_type)
+        return (
+            queryset.values(
+                "product", "product__name", "product__name_ar", "purchase_type"
+            )
+            .annotate(orders=Sum("orders"), units=Sum("units"), revenue=Sum("revenue"))
+            .order_by("-revenue", "product__name")
+        )
+
+
+class CategorySalesReportView(SalesReportMixin, generics.ListAPIView):
+    serializer_class = CategorySalesReportSerializer
+    pagination_class = StandardResultsSetPagination
+
+    def get_queryset(self):
+        start, end = self.get_date_range()
+        return (
+            DailyCategorySales.objects.filter(date__range=(start, end))
+            .values("category", "category__name", "category__name_ar")
+            .annotate(orders=Sum("orders"), units=Sum("units"), revenue=Sum("revenue"))
+            .order_by("-revenue", "category__name")
+        )
+
+
+class DashboardStatsView(generics.RetrieveAPIView):
+    serializer_class = DashboardStatsSerializer
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [CustomerPermission]
+
+    def get_object(self):
+        stats = DashboardStats.objects.filter(pk=DASHBOARD_STATS_ID).first()
+        if stats is None:
+            stats = reconcile_dashboard_stats()
+        return stats
@@ -21,7 +21,7 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from music_sheet.custom_permissions import OnlyCustomer, CustomerPermission
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from music_sheet.authentication import JWTAuthentication
 
 from music_sheet.pagination import StandardResultsSetPagination
 
@@ -56,8 +56,7 @@ class CustomerCartRetrieveView(generics.RetrieveAPIView):
 
     def get_object(self):
         # customer_id = self.request.query_params.get("customer_id")
-        customer_id = self.request.user.customer.id
-        customer = get_object_or_404(Customer, id=customer_id)
+        customer = self.request.user.customer
         cart = get_object_or_404(Cart, customer=customer)
         return cart
 
@@ -440,8 +439,7 @@ class CustomerWishListRetrieveView(generics.RetrieveAPIView):
 
     def get_object(self):
         # customer_id = self.request.query_params.get("customer_id")
-        customer_id = self.request.user.customer.id
-        customer = get_object_or_404(Customer, id=customer_id)
+        customer = self.request.user.customer
         wishlist = get_object_or_404(Wishlist, customer=customer)
         return wishlist
 
@@ -0,0 +1,44 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.category.models import Category
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized path and depth of every category."
+
+    def handle(self, *args, **options):
+        categories = Category.objects.only("id", "parent_id", "path", "depth")
+        children = defaultdict(list)
+        for category in categories:
+            children[category.parent_id].append(category)
+
+        changed = []
+        reached = 0
+        stack = [(category, "") for category in children[None]]
+        while stack:
+            category, parent_path = stack.pop()
+            reached += 1
+            path = f"{parent_path}{category.id.hex}/"
+            depth = path.count("/") - 1
+            if (category.path, category.depth) != (path, depth):
+                category.path, category.depth = path, depth
+                changed.append(category)
+            stack.extend((child, path) for child in children[category.id])
+
+        with transaction.atomic():
+            Category.objects.bulk_update(changed, ["path", "depth"], batch_size=500)
+
+        unreachable = sum(len(nodes) for nodes in children.values()) - reached
+        if unreachable:
+            # Only a parent loop keeps a category from reaching a root
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{unreachable} categories are part of a parent loop and were skipped."
+                )
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated the path of {len(changed)} categories.")
+        )
@@ -1,5 +1,9 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext_lazy as _
 from django.dispatch import receiver
 from django.db.models.signals import pre_save
 from django.core.files.base import ContentFile
@@ -56,10 +60,27 @@ class Category(models.Model):
         null=True,
         upload_to=category_image_file_path,
     )
-
+    # Materialized path, the hex ids of the ancestors and the category
+    # itself each followed by "/", kept up to date by save()
+    path = models.CharField(
+        max_length=1024, db_index=True, editable=False, default=""
+    )
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    # Products that are not deleted in the category or its subcategories, and
+    # those of them that are active, see apps.product.counts
+    product_count = models.PositiveIntegerField(default=0, editable=False)
+    active_product_count = models.PositiveIntegerField(default=0, editable=False)
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "parent" in update_fields:
+            with transaction.atomic():
+                self._update_path()
+                if update_fields is not None:
+                    kwargs["update_fields"] = {*update_fields, "path", "depth"}
+                super().save(*args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
         if self.image:
             image_size = self.image.size  # Size in bytes
             max_size_bytes = 500 * 500  # .5 MB
@@ -67,6 +88,42 @@ class Category(models.Model):
                 # Resize the photo
                 self.resize_photo()
 
+    def _update_path(self):
+        parent_path = ""
+        if self.parent_id is not None:
+            parent_path = (
+                Category.objects.filter(pk=self.parent_id)
+                .values_list("path", flat=True)
+                .get()
+            )
+        old_path = ""
+        if not self._state.adding:
+            # Read back rather than trusted, the instance may predate a move
+            old_path = (
+                Category.objects.filter(pk=self.pk)
+                .values_list("path", flat=True)
+                .first()
+                or ""
+            )
+        if self.parent_id == self.pk or (old_path and parent_path.startswith(old_path)):
+            raise ValidationError(
+                _("A category can not be moved under itself or its subcategories.")
+            )
+
+        # Lets the product counts of the former ancestors follow a move
+        self._previous_path = old_path
+        self.path = f"{parent_path}{self.pk.hex}/"
+        self.depth = self.path.count("/") - 1
+        if old_path and old_path != self.path:
+            # Moved, carry the whole subtree along in one UPDATE
+            descendants = Category.objects.filter(path__startswith=old_path).exclude(
+                pk=self.pk
+            )
+            descendants.update(
+                path=Concat(Value(self.path), Substr("path", len(old_path) + 1)),
+                depth=F("depth") + (self.depth - old_path.count("/") + 1),
+            )
+
     def resize_photo(self):
         # Set the maximum size in bytes (1 MB = 1024 * 1024 bytes)
         max_size_bytes = 500 * 500
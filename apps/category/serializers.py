@@ -1,4 +1,5 @@
 from apps.category.models import Category, CategoryImages
+from music_sheet.uploads import save_uploads
 
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
@@ -72,6 +73,8 @@ class CategorySerializer(serializers.ModelSerializer):
             "image",
             "gallery",
             "uploaded_images",
+            "product_count",
+            "active_product_count",
         ]
         read_only_fields = [
             "id",
@@ -94,6 +97,17 @@ class CategorySerializer(serializers.ModelSerializer):
     def get_parent_name_ar(self, obj):
         return obj.parent.name_ar if obj.parent else "NA"
 
+    def validate_parent(self, value):
+        # Category.save refuses it as well, this only turns it into a 400
+        instance = self.instance
+        if value is None or instance is None:
+            return value
+        if value == instance or (instance.path and value.path.startswith(instance.path)):
+            raise ValidationError(
+                _("A category can not be moved under itself or its subcategories.")
+            )
+        return value
+
     def create(self, validated_data):
         uploaded_images_data = validated_data.pop(
             "uploaded_images", None
@@ -103,13 +117,9 @@ class CategorySerializer(serializers.ModelSerializer):
         )  # Create the category object
 
         if uploaded_images_data:
-            for image_data in uploaded_images_data:
-                category_image = CategoryImages.objects.create(
-                    category=category, image=image_data
-                )  # Set category field
-                category.gallery.add(
-                    category_image
-                )  # Associate category image with the category
+            save_uploads(
+                CategoryImages, "image", uploaded_images_data, category=category
+            )
 
         return category
 
@@ -128,11 +138,9 @@ class CategorySerializer(serializers.ModelSerializer):
             # instance.gallery.all().delete()
 
             # Create new images
-            for image_data in uploaded_images_data:
-                category_image = CategoryImages.objects.create(
-                    category=instance, image=image_data
-                )
-                instance.gallery.add(category_image)
+            save_uploads(
+                CategoryImages, "image", uploaded_images_data, category=instance
+            )
 
         return instance
 
@@ -142,9 +150,19 @@ class NestedCategorySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Category
-        fields = ["id", "name", "name_ar", "slug", "image", "children"]
+        fields = [
+            "id",
+            "name",
+            "name_ar",
+            "slug",
+            "image",
+            "product_count",
+            "active_product_count",
+            "children",
+        ]
 
     def get_children(self, obj):
+        # The category views render from apps.category.tree instead
         children = Category.objects.filter(parent=obj)
         serializer = NestedCategorySerializer(children, many=True, context=self.context)
         return serializer.data
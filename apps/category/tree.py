@@ -0,0 +1,113 @@
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.utils.translation import get_language
+
+from apps.category.models import Category
+
+
+# Cached trees are keyed by a version that every Category change replaces,
+# see apps.category.signals
+TREE_VERSION_KEY = "category_tree:version"
+
+
+def _tree_version():
+    version = cache.get(TREE_VERSION_KEY)
+    if version is None:
+        cache.add(TREE_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(TREE_VERSION_KEY)
+    return version
+
+
+def bump_category_tree_version():
+    cache.set(TREE_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def _build_forest():
+    # One query, nodes are linked to their parents through an index by id
+    children = defaultdict(list)
+    for row in (
+        Category.objects.filter(is_deleted=False, is_active=True)
+        .order_by("-created_at")
+        .values(
+            "id",
+            "name",
+            "name_ar",
+            "slug",
+            "image",
+            "parent_id",
+            "product_count",
+            "active_product_count",
+        )
+    ):
+        node = {
+            "id": str(row["id"]),
+            "name": row["name"],
+            "name_ar": row["name_ar"],
+            "slug": row["slug"],
+            "image": default_storage.url(row["image"]) if row["image"] else None,
+            "product_count": row["product_count"],
+            "active_product_count": row["active_product_count"],
+            "children": children[row["id"]],
+        }
+        children[row["parent_id"]].append(node)
+
+    # Categories under an inactive one are not reachable, they go with it
+    nodes = {}
+    pending = list(children[None])
+    while pending:
+        node = pending.pop()
+        if node["id"] not in nodes:
+            nodes[node["id"]] = node
+            pending.extend(node["children"])
+    return {"roots": children[None], "nodes": nodes}
+
+
+def category_forest():
+    """
+    Return the active categories as {"roots": [...], "nodes": {id: node}},
+    every node holding its children. The children of an inactive category
+    are left out with it. Cached per language until a category changes.
+    """
+    key = f"category_tree:{_tree_version()}:{get_language()}"
+    forest = cache.get(key)
+    if forest is None:
+        forest = _build_forest()
+        cache.set(key, forest, settings.CATEGORY_TREE_CACHE_TTL)
+    return forest
+
+
+def category_children(category_id):
+    # Child nodes of a category, empty for an unknown, inactive or deleted one
+    try:
+        category_id = str(uuid.UUID(str(category_id)))
+    except ValueError:
+        return []
+    node = category_forest()["nodes"].get(category_id)
+    return node["children"] if node else []
+
+
+def render_category_nodes(nodes, request=None, seen=None):
+    # Copies nodes in the NestedCategorySerializer format, image urls made
+    # absolute for the request
+    seen = set() if seen is None else seen
+    rendered = []
+    for node in nodes:
+        if node["id"] in seen:
+            # A parent loop, each category is rendered once
+            continue
+        seen.add(node["id"])
+        image = node["image"]
+        if image and request is not None:
+            image = request.build_absolute_uri(image)
+        rendered.append(
+            {
+                **node,
+                "image": image,
+                "children": render_category_nodes(node["children"], request, seen),
+            }
+        )
+    return rendered
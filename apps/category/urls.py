@@ -6,6 +6,7 @@ from apps.category.views import (
     CategoryRetrieveView,
     DeletedCategoryListView,
     ChildrenCategoriesView,
+    CategoryBreadcrumbsView,
     ActiveCategoryListView,
     CategoryChangeActiveView,
     CategoryUpdateView,
@@ -35,6 +36,11 @@ urlpatterns = [
         ChildrenCategoriesView.as_view(),
         name="category-children",
     ),
+    path(
+        "category_breadcrumbs/",
+        CategoryBreadcrumbsView.as_view(),
+        name="category-breadcrumbs",
+    ),
     path(
         "category_active_list/",
         ActiveCategoryListView.as_view(),
@@ -1,5 +1,6 @@
 from django.utils.translation import gettext_lazy as _
 from django.shortcuts import get_object_or_404
+from django.db.models import F, Subquery
 
 from django_filters.rest_framework import DjangoFilterBackend
 
@@ -11,7 +12,7 @@ from rest_framework import (
     generics,
     status,
 )
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from music_sheet.authentication import JWTAuthentication
 
 from apps.category.models import Category, CategoryImages
 from apps.category.serializers import (
@@ -24,6 +25,11 @@ from apps.category.serializers import (
     CategoryImageSerializer,
 )
 from apps.category.filters import CategoryFilter
+from apps.category.tree import (
+    category_children,
+    category_forest,
+    render_category_nodes,
+)
 
 from music_sheet.pagination import StandardResultsSetPagination
 from music_sheet.custom_permissions import CustomerPermission
@@ -129,20 +135,27 @@ class ChildrenCategoriesView(generics.ListAPIView):
     # permission_classes = [CustomerPermission]
     pagination_class = StandardResultsSetPagination
 
-    def get_queryset(self):
+    def list(self, request, *args, **kwargs):
+        # Served from the cached category tree, see apps.category.tree
         category_id = self.request.query_params.get("category_id")
-        parent_category = Category.objects.filter(id=category_id).first()
+        children = category_children(category_id)
+        return Response(render_category_nodes(children, request))
 
-        if parent_category:
-            return Category.objects.filter(parent=parent_category)
-        else:
-            return Category.objects.none()
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        # serializer = self.serializer_class(queryset, many=True)
-        serializer = self.serializer_class(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+class CategoryBreadcrumbsView(generics.ListAPIView):
+    # The category and its ancestors from the root down
+    serializer_class = ParentCategorySerializer
+
+    def get_queryset(self):
+        category_id = self.request.query_params.get("category_id")
+        category_path = Category.objects.filter(id=category_id).values("path")[:1]
+        # Every category whose path is a prefix of the category's, one query
+        return (
+            Category.objects.exclude(path="")
+            .annotate(category_path=Subquery(category_path))
+            .filter(category_path__startswith=F("path"))
+            .order_by("depth")
+        )
 
 
 class ActiveCategoryListView(generics.ListAPIView):
@@ -387,9 +400,11 @@ class CategoryDialogView(generics.ListAPIView):
 
 
 class ParentCategoryDialog(generics.ListAPIView):
-    queryset = Category.objects.filter(parent__isnull=True, is_deleted=False).order_by(
-        "-created_at"
-    )
     serializer_class = NestedCategorySerializer
     # authentication_classes = [JWTAuthentication]
     # permission_classes = [CustomerPermission]
+
+    def list(self, request, *args, **kwargs):
+        # Served from the cached category tree, see apps.category.tree
+        roots = category_forest()["roots"]
+        return Response(render_category_nodes(roots, request))
@@ -9,7 +9,7 @@ from rest_framework import (
     status,
 )
 
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from music_sheet.authentication import JWTAuthentication
 
 from apps.contact_us.models import ContactUs
 from .serializers import ContactUsSerializer, ContactUsReadSerializer
@@ -0,0 +1,17 @@
+from django_filters import FilterSet, NumberFilter, DateFilter
+from apps.customer.models import Customer
+
+
+class CustomerFilter(FilterSet):
+    # The purchase figures are annotations added by CustomerListView
+    min_order_count = NumberFilter(field_name="order_count", lookup_expr="gte")
+    max_order_count = NumberFilter(field_name="order_count", lookup_expr="lte")
+    min_total_spent = NumberFilter(field_name="total_spent", lookup_expr="gte")
+    max_total_spent = NumberFilter(field_name="total_spent", lookup_expr="lte")
+    last_order_after = DateFilter(field_name="last_order_at", lookup_expr="date__gte")
+    last_order_before = DateFilter(field_name="last_order_at", lookup_expr="date__lte")
+    min_rating_count = NumberFilter(field_name="rating_count", lookup_expr="gte")
+
+    class Meta:
+        model = Customer
+        fields = ["is_active"]
@@ -90,6 +90,24 @@ class CustomerSerializer(serializers.ModelSerializer):
         return obj.updated_at.strftime("%Y-%m-%d")
 
 
+class CustomerListSerializer(CustomerSerializer):
+    # Purchase figures annotated by CustomerListView
+    order_count = serializers.IntegerField(read_only=True)
+    total_spent = serializers.DecimalField(
+        max_digits=14, decimal_places=2, read_only=True
+    )
+    last_order_at = serializers.DateTimeField(read_only=True)
+    rating_count = serializers.IntegerField(read_only=True)
+
+    class Meta(CustomerSerializer.Meta):
+        fields = CustomerSerializer.Meta.fields + [
+            "order_count",
+            "total_spent",
+            "last_order_at",
+            "rating_count",
+        ]
+
+
 class CustomerActivationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Customer
@@ -1,6 +1,16 @@
 from django.http import Http404, HttpResponse  # added by me
 from django.utils.translation import gettext_lazy as _
-from django.db.models import Q
+from django.db.models import (
+    Count,
+    DecimalField,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
@@ -22,7 +32,7 @@ from rest_framework.decorators import action, api_view
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.parsers import JSONParser
 
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from music_sheet.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
 
 import logging
@@ -30,9 +40,17 @@ import json
 
 import string
 import random
+from decimal import Decimal
 
+from apps.customer.filters import CustomerFilter
 from apps.customer.models import Customer
-from apps.customer.serializers import CustomerSerializer, CustomerActivationSerializer
+from apps.customer.serializers import (
+    CustomerSerializer,
+    CustomerListSerializer,
+    CustomerActivationSerializer,
+)
+from apps.order.models import Order
+from apps.rating.models import Rating
 
 from music_sheet.pagination import StandardResultsSetPagination
 
@@ -113,13 +131,53 @@ class CustomerListView(generics.ListAPIView):
     queryset = Customer.objects.filter(is_deleted=False, is_customer=True).order_by(
         "-created_at"
     )
-    serializer_class = CustomerSerializer
+    serializer_class = CustomerListSerializer
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated, CustomerPermission]
     pagination_class = StandardResultsSetPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_class = CustomerFilter
     search_fields = ["name", "name_ar", "mobile_number", "email"]
-    ordering_fields = ["name"]
+    ordering_fields = [
+        "name",
+        "created_at",
+        "order_count",
+        "total_spent",
+        "last_order_at",
+        "rating_count",
+    ]
+
+    def get_queryset(self):
+        # Each figure is a correlated subquery, so the page is still one query
+        completed_orders = Order.objects.filter(
+            created_by=OuterRef("pk"), payment_status="Complete"
+        ).values("created_by")
+        ratings = Rating.objects.filter(created_by=OuterRef("pk")).values("created_by")
+        return (
+            super()
+            .get_queryset()
+            .annotate(
+                order_count=Coalesce(
+                    Subquery(completed_orders.annotate(count=Count("pk")).values("count")),
+                    0,
+                ),
+                total_spent=Coalesce(
+                    Subquery(
+                        completed_orders.annotate(total=Sum("final_total")).values(
+                            "total"
+                        )
+                    ),
+                    Value(Decimal("0.00")),
+                    output_field=DecimalField(max_digits=14, decimal_places=2),
+                ),
+                last_order_at=Subquery(
+                    completed_orders.annotate(last=Max("created_at")).values("last")
+                ),
+                rating_count=Coalesce(
+                    Subquery(ratings.annotate(count=Count("pk")).values("count")), 0
+                ),
+            )
+        )
 
 
 class CustomerRetrieve(generics.RetrieveAPIView):
@@ -0,0 +1,102 @@
+import os
+import signal
+import socket
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from apps.jobs.queue import claim_job, recover_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued jobs with a pool of worker threads."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.JOB_WORKERS,
+            help="Number of jobs run at the same time.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no job is due instead of waiting for more.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help="Seconds an idle worker waits before polling again.",
+        )
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        # Job name -> [runs, failures, total ms, max ms]
+        self.stats = defaultdict(lambda: [0, 0, 0, 0])
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: self.stop.set())
+
+        recover_stale_jobs()
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        threads = [
+            threading.Thread(
+                target=self.work,
+                args=(f"{prefix}:{number}", options["burst"], options["interval"]),
+                daemon=True,
+            )
+            for number in range(options["workers"])
+        ]
+        for thread in threads:
+            thread.start()
+
+        # Recover jobs of dead workers now and then while the pool runs
+        recovered_at = time.monotonic()
+        while any(thread.is_alive() for thread in threads) and not self.stop.is_set():
+            self.stop.wait(options["interval"])
+            if time.monotonic() - recovered_at >= settings.JOB_STALE_AFTER / 2:
+                recover_stale_jobs()
+                recovered_at = time.monotonic()
+        for thread in threads:
+            thread.join()
+
+        self.report()
+
+    def work(self, worker_id, burst, interval):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                job = claim_job(worker_id)
+                if job is None:
+                    if burst:
+                        break
+                    self.stop.wait(interval)
+                    continue
+
+                job = run_job(job)
+                with self.lock:
+                    stats = self.stats[job.name]
+                    stats[0] += 1
+                    stats[1] += job.status != "Done"
+                    stats[2] += job.duration_ms
+                    stats[3] = max(stats[3], job.duration_ms)
+        finally:
+            connection.close()
+
+    def report(self):
+        for name, (runs, failures, total_ms, max_ms) in sorted(self.stats.items()):
+            self.stdout.write(
+                f"{name}: {runs} runs, {failures} failed, "
+                f"avg {total_ms // runs} ms, max {max_ms} ms"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Ran {sum(stats[0] for stats in self.stats.values())} jobs."
+            )
+        )
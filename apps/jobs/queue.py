@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.jobs.models import Job
+
+
+logger = logging.getLogger(__name__)
+
+# Candidates fetched per claim attempt when SKIP LOCKED is not available
+CLAIM_CANDIDATES = 10
+# Serializes claims within a process on databases without SKIP LOCKED, so
+# worker threads do not fight over the same rows (and SQLite's write lock)
+_claim_lock = threading.Lock()
+
+
+def enqueue(
+    func, *args, priority=0, run_at=None, delay=None, max_attempts=None, **kwargs
+):
+    """
+    Queue func(*args, **kwargs) for the run_jobs workers and return the Job.
+
+    func is a module level function or its dotted path, arguments must be
+    JSON serializable. The job runs at run_at, or delay after now, and jobs
+    with a higher priority run first. Inside a transaction the job becomes
+    visible to the workers once it commits.
+    """
+    name = func if isinstance(func, str) else f"{func.__module__}.{func.__qualname__}"
+    if run_at is None:
+        run_at = timezone.now() + (delay or timedelta())
+    return Job.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs,
+        priority=priority,
+        run_at=run_at,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def _due_jobs(now):
+    return Job.objects.filter(status="Queued", run_at__lte=now).order_by(
+        "-priority", "run_at"
+    )
+
+
+def _running_fields(worker_id, now):
+    return {
+        "status": "Running",
+        "locked_by": worker_id,
+        "started_at": now,
+        "attempts": F("attempts") + 1,
+    }
+
+
+def claim_job(worker_id):
+    # Marks the next due job as running for this worker and returns it
+    now = timezone.now()
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            pk = (
+                _due_jobs(now)
+                .select_for_update(skip_locked=True)
+                .values_list("pk", flat=True)
+                .first()
+            )
+            if pk is None:
+                return None
+            Job.objects.filter(pk=pk).update(**_running_fields(worker_id, now))
+    else:
+        with _claim_lock:
+            candidates = _due_jobs(now).values_list("pk", flat=True)[:CLAIM_CANDIDATES]
+            for pk in candidates:
+                # Only one worker (in any process) can move it out of Queued
+                if Job.objects.filter(pk=pk, status="Queued").update(
+                    **_running_fields(worker_id, now)
+                ):
+                    break
+            else:
+                return None
+    return Job.objects.get(pk=pk)
+
+
+def retry_delay(attempts):
+    # Exponential backoff, JOB_RETRY_DELAY seconds after the first failure
+    return timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def run_job(job):
+    """
+    Call the job's function and record the outcome and how long it took.
+    A failed job is queued again with backoff until it runs out of attempts.
+    """
+    started = time.perf_counter()
+    try:
+        import_string(job.name)(*job.args, **job.kwargs)
+    except Exception as error:
+        job.duration_ms = int((time.perf_counter() - started) * 1000)
+        job.last_error = f"{type(error).__name__}: {error}"
+        job.finished_at = timezone.now()
+        if job.attempts < job.max_attempts:
+            job.status = "Queued"
+            job.run_at = job.finished_at + retry_delay(job.attempts)
+            logger.warning(f"Job {job.name} ({job.pk}) failed, retrying: {error}")
+        else:
+            job.status = "Failed"
+            logger.exception(f"Job {job.name} ({job.pk}) failed for good")
+    else:
+        job.duration_ms = int((time.perf_counter() - started) * 1000)
+        job.finished_at = timezone.now()
+        job.status = "Done"
+        logger.info(
+            f"Job {job.name} ({job.pk}) done in {job.duration_ms} ms, "
+            f"waited {int((job.started_at - job.run_at).total_seconds() * 1000)} ms"
+        )
+
+    # Skipped when the job was recovered as stale in the meantime
+    Job.objects.filter(pk=job.pk, status="Running", locked_by=job.locked_by).update(
+        status=job.status,
+        run_at=job.run_at,
+        locked_by="",
+        finished_at=job.finished_at,
+        duration_ms=job.duration_ms,
+        last_error=job.last_error,
+    )
+    return job
+
+
+def recover_stale_jobs():
+    """
+    Queue again the jobs whose worker died while running them, i.e. that
+    have been running for longer than JOB_STALE_AFTER seconds.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status="Running",
+        started_at__lt=now - timedelta(seconds=settings.JOB_STALE_AFTER),
+    )
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status="Failed",
+        locked_by="",
+        finished_at=now,
+        last_error="Worker stopped while running the job",
+    )
+    requeued = stale.filter(attempts__lt=F("max_attempts")).update(
+        status="Queued", locked_by="", run_at=now
+    )
+    return requeued, failed
@@ -0,0 +1,138 @@
+import threading
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    IntegrityError,
+    connection,
+    connections,
+    transaction,
+)
+from django.db.models import F, Max
+
+
+FIRST_ORDER_NUMBER = 1000
+ORDER_NUMBER_SEQUENCE = "order_order_number_seq"
+ORDER_NUMBER_COUNTER = "order_number"
+
+
+class OrderNumberAllocator:
+    """
+    Hands out unique order numbers without scanning the orders table.
+
+    On PostgreSQL numbers come from a database sequence, elsewhere from an
+    atomic counter row. With a block size above 1 each process reserves a
+    whole range in one round trip and serves it from memory, so numbers stay
+    unique but are no longer gap-free or strictly ordered across workers.
+    """
+
+    def __init__(self, block_size=None):
+        self.block_size = max(
+            int(block_size or getattr(settings, "ORDER_NUMBER_BLOCK_SIZE", 1)), 1
+        )
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def allocate(self):
+        with self._lock:
+            if self._next >= self._end:
+                first, size = self._reserve_block()
+                if size > 1 and self._rolls_back_with_caller():
+                    # The counter bump is undone if the caller's transaction
+                    # rolls back, another worker would then get the same
+                    # block. The rest of it is only served once it committed.
+                    transaction.on_commit(
+                        partial(self._adopt_block, first + 1, first + size)
+                    )
+                    return first
+                self._next, self._end = first, first + size
+            number = self._next
+            self._next += 1
+            return number
+
+    def _adopt_block(self, start, end):
+        with self._lock:
+            if self._next >= self._end:
+                self._next, self._end = start, end
+
+    def _rolls_back_with_caller(self):
+        # Sequences are not transactional, counter rows are
+        return connection.vendor != "postgresql" and connection.in_atomic_block
+
+    def _reserve_block(self):
+        # Returns the first number and the size of a freshly reserved block
+        if connection.vendor == "postgresql":
+            return self._reserve_from_sequence()
+        return self._reserve_from_counter(), self.block_size
+
+    def _reserve_from_sequence(self):
+        # The sequence is made by create_order_number_sequence after migrate,
+        # its increment is the block size
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(%s), increment_by FROM pg_sequences "
+                "WHERE schemaname = current_schema() AND sequencename = %s",
+                [ORDER_NUMBER_SEQUENCE, ORDER_NUMBER_SEQUENCE],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            raise ImproperlyConfigured(
+                f"The {ORDER_NUMBER_SEQUENCE} sequence is missing, run migrate."
+            )
+        return row
+
+    def _reserve_from_counter(self):
+        from apps.order.models import OrderNumberCounter
+
+        counter = OrderNumberCounter.objects.filter(name=ORDER_NUMBER_COUNTER)
+        with transaction.atomic():
+            # The UPDATE takes the row (or database) write lock, so the value
+            # read back below belongs to this transaction alone.
+            if counter.update(value=F("value") + self.block_size):
+                return counter.values_list("value", flat=True).get() - self.block_size + 1
+
+        # First allocation ever: seed the counter from the existing orders
+        first_number = first_free_order_number()
+        try:
+            with transaction.atomic():
+                OrderNumberCounter.objects.create(
+                    name=ORDER_NUMBER_COUNTER,
+                    value=first_number + self.block_size - 1,
+                )
+            return first_number
+        except IntegrityError:
+            # Another worker seeded it first
+            return self._reserve_from_counter()
+
+
+def first_free_order_number(using=DEFAULT_DB_ALIAS):
+    from apps.order.models import Order
+
+    orders = Order.objects.using(using)
+    last_number = orders.aggregate(Max("order_number"))["order_number__max"]
+    return FIRST_ORDER_NUMBER if last_number is None else last_number + 1
+
+
+def create_order_number_sequence(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    # Run after migrate, never while serving. The increment is fixed once the
+    # sequence exists: workers of a rolling deploy could otherwise serve
+    # overlapping blocks. Change it with ALTER SEQUENCE while no worker runs.
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE SEQUENCE IF NOT EXISTS {ORDER_NUMBER_SEQUENCE} "
+            f"INCREMENT BY {max(settings.ORDER_NUMBER_BLOCK_SIZE, 1)} "
+            f"START WITH {first_free_order_number(using)}"
+        )
+
+
+order_number_allocator = OrderNumberAllocator()
+
+
+def allocate_order_number():
+    return order_number_allocator.allocate()
@@ -0,0 +1,221 @@
+import asyncio
+import time
+import uuid
+import weakref
+from functools import lru_cache
+
+import httpx
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class PaymentGatewayError(Exception):
+    """The payment provider rejected the request or could not be reached."""
+
+    def __init__(self, detail, status_code=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+class PaymentGateway:
+    """
+    Interface every payment gateway implements.
+
+    Both methods are coroutines so they can be awaited from async views
+    without tying up a worker while the provider answers.
+    """
+
+    async def create_payment(self, amount, currency="USD"):
+        # Returns the approval url the customer is redirected to
+        raise NotImplementedError
+
+    async def execute_payment(self, payment_id, payer_id):
+        # Returns the executed payment as a dict
+        raise NotImplementedError
+
+
+class PayPalGateway(PaymentGateway):
+    """
+    PayPal REST payments API over a pooled async HTTP client.
+
+    Connection errors, 5xx and 429 responses are retried with exponential
+    backoff. Every POST carries a PayPal-Request-Id so a retried request is
+    never applied twice on PayPal's side.
+    """
+
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+    RETRY_BACKOFF = 0.5
+
+    def __init__(self):
+        self.base_url = settings.PAYPAL_BASE_URL.rstrip("/")
+        self.max_retries = settings.PAYPAL_MAX_RETRIES
+        self.timeout = httpx.Timeout(settings.PAYPAL_TIMEOUT)
+        self.limits = httpx.Limits(
+            max_connections=settings.PAYPAL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.PAYPAL_MAX_CONNECTIONS,
+        )
+        # An AsyncClient is bound to the event loop it was first used on
+        self._clients = weakref.WeakKeyDictionary()
+        self._access_token = None
+        self._access_token_expires_at = 0
+
+    async def _get_client(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._clients:
+            client = httpx.AsyncClient(
+                base_url=self.base_url, timeout=self.timeout, limits=self.limits
+            )
+            lifetime = self._client_lifetime(client)
+            await lifetime.__anext__()
+            # The generator is kept with the client, dropping it would close
+            # the client right away
+            self._clients[loop] = (client, lifetime)
+        return self._clients[loop][0]
+
+    async def _client_lifetime(self, client):
+        # Loops finalize their pending async generators before they close,
+        # asyncio.run and async_to_sync both do. So the client of a loop, e.g.
+        # the one async_to_sync makes for every request under WSGI, is closed
+        # along with it instead of leaving its connections open.
+        try:
+            yield client
+        finally:
+            # The generator refers to its loop, so the entry has to go too
+            self._clients.pop(asyncio.get_running_loop(), None)
+            await client.aclose()
+
+    async def _send(self, method, url, **kwargs):
+        client = await self._get_client()
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as exc:
+                if attempt == self.max_retries:
+                    raise PaymentGatewayError(
+                        f"PayPal could not be reached: {exc}", status_code=502
+                    )
+            else:
+                if (
+                    response.status_code not in self.RETRY_STATUS_CODES
+                    or attempt == self.max_retries
+                ):
+                    return response
+            await asyncio.sleep(self.RETRY_BACKOFF * 2**attempt)
+
+    async def _get_access_token(self):
+        if self._access_token and time.monotonic() < self._access_token_expires_at:
+            return self._access_token
+
+        response = await self._send(
+            "POST",
+            "/v1/oauth2/token",
+            data={"grant_type": "client_credentials"},
+            auth=(settings.PAYPAL_CLIENT_ID, settings.PAYPAL_CLIENT_SECRET),
+        )
+        if response.status_code != 200:
+            raise PaymentGatewayError(self._error(response), status_code=502)
+
+        data = response.json()
+        self._access_token = data["access_token"]
+        # Refresh a minute early so a token never expires mid-request
+        self._access_token_expires_at = time.monotonic() + data["expires_in"] - 60
+        return self._access_token
+
+    async def _post(self, url, payload, request_id):
+        for _ in range(2):
+            token = await self._get_access_token()
+            response = await self._send(
+                "POST",
+                url,
+                json=payload,
+                headers={
+                    "Authorization": f"Bearer {token}",
+                    "PayPal-Request-Id": request_id,
+                },
+            )
+            if response.status_code != 401:
+                break
+            # The cached token was revoked, fetch a new one and try once more
+            self._access_token = None
+
+        if response.status_code >= 400:
+            raise PaymentGatewayError(
+                self._error(response),
+                status_code=502 if response.status_code >= 500 else 400,
+            )
+        return response.json()
+
+    def _error(self, response):
+        try:
+            return response.json()
+        except ValueError:
+            return response.text
+
+    async def create_payment(self, amount, currency="USD"):
+        payment = await self._post(
+            "/v1/payments/payment",
+            {
+                "intent": "sale",
+                "payer": {
+                    "payment_method": "paypal",
+                },
+                "redirect_urls": {
+                    "return_url": settings.PAYPAL_RETURN_URL,
+                    "cancel_url": settings.PAYPAL_CANCEL_URL,
+                },
+                "transactions": [
+                    {
+                        "amount": {
+                            "total": str(amount),
+                            "currency": currency,
+                        },
+                        "description": "Payment for an item",
+                        "soft_descriptor": "Score",
+                    }
+                ],
+            },
+            request_id=str(uuid.uuid4()),
+        )
+        for link in payment.get("links", []):
+            if link.get("rel") == "approval_url":
+                return link["href"]
+        raise PaymentGatewayError("PayPal did not return an approval url.")
+
+    async def execute_payment(self, payment_id, payer_id):
+        return await self._post(
+            f"/v1/payments/payment/{payment_id}/execute",
+            {"payer_id": payer_id},
+            request_id=f"execute-{payment_id}",
+        )
+
+
+class StubGateway(PaymentGateway):
+    """
+    Offline gateway for local development and load testing checkout.
+
+    Approves every payment after STUB_GATEWAY_LATENCY seconds.
+    """
+
+    def __init__(self):
+        self.latency = settings.STUB_GATEWAY_LATENCY
+
+    async def create_payment(self, amount, currency="USD"):
+        await asyncio.sleep(self.latency)
+        payment_id = f"PAYID-STUB-{uuid.uuid4().hex.upper()}"
+        return f"{settings.PAYPAL_RETURN_URL}?paymentId={payment_id}&PayerID=STUBPAYER"
+
+    async def execute_payment(self, payment_id, payer_id):
+        await asyncio.sleep(self.latency)
+        return {
+            "id": payment_id,
+            "intent": "sale",
+            "state": "approved",
+            "payer": {"payer_info": {"payer_id": payer_id}},
+        }
+
+
+@lru_cache(maxsize=None)
+def get_payment_gateway():
+    return import_string(settings.PAYMENT_GATEWAY)()
@@ -6,6 +6,7 @@ from apps.customer.models import Customer
 import uuid
 from decimal import Decimal
 from apps.product.models import Product
+from apps.order.allocator import allocate_order_number
 
 class Order(models.Model):
     PAYMENT_STATUS_CHOICES = [
@@ -33,7 +34,9 @@ class Order(models.Model):
         choices=PAYMENT_STATUS_CHOICES,
     )
     final_total = models.DecimalField(max_digits=10, decimal_places=2)
-    paypal_payment_id = models.CharField(max_length=255)
+    paypal_payment_id = models.CharField(
+        max_length=255, unique=True, blank=True, null=True
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(
@@ -51,6 +54,14 @@ class Order(models.Model):
         related_name="order_updated_by_customer",
     )
 
+    class Meta:
+        indexes = [
+            # Serves a customer's order history newest first
+            models.Index(fields=["created_by", "-created_at"]),
+            # Serves the per-customer purchase figures of the customer list
+            models.Index(fields=["created_by", "payment_status", "created_at"]),
+        ]
+
     # def calculate_final_total(self):
     #     order_items_total = self.order_items.aggregate(
     #         total=models.Sum(
@@ -74,22 +85,53 @@ class Order(models.Model):
     #     super(Order, self).save(*args, **kwargs)
     def save(self, *args, **kwargs):
         if not self.order_number:
-            last_order = Order.objects.all().order_by("order_number").last()
-            if last_order:
-                self.order_number = last_order.order_number + 1
-            else:
-                self.order_number = 1000
+            self.order_number = allocate_order_number()
 
         if not self.final_total:  # Check if final_total is not set
             self.final_total = 0  # Initialize final_total to 0
 
         super(Order, self).save(*args, **kwargs)
 
-        if self.order_items.exists():  # Check if order_items exist
-            self.final_total = sum(
-                item.sub_total * item.quantity for item in self.order_items.all()
-            )
-            super(Order, self).save(*args, **kwargs)
+
+class OrderNumberCounter(models.Model):
+    # Last order number handed out, used where no database sequence exists
+    name = models.CharField(max_length=64, primary_key=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+
+class PaymentExecution(models.Model):
+    # One row per PayPal payment, claimed before PayPal is called so retries
+    # and concurrent duplicates never execute the same payment twice
+    STATUS_CHOICES = [
+        ("Processing", ("Processing")),
+        ("Complete", ("Complete")),
+    ]
+    id = models.UUIDField(
+        default=uuid.uuid4,
+        primary_key=True,
+        editable=False,
+    )
+    payment_id = models.CharField(max_length=255, unique=True)
+    customer = models.ForeignKey(
+        Customer,
+        on_delete=models.CASCADE,
+        related_name="payment_executions",
+    )
+    order = models.OneToOneField(
+        Order,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="payment_execution",
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default="Processing",
+    )
+    payment = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
 
 class OrderItems(models.Model):
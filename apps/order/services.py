@@ -0,0 +1,171 @@
+import asyncio
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.analytics.rollups import record_order_sales
+from apps.cart.models import Cart, CartItems
+from apps.order.models import Order, OrderItems, PaymentExecution
+
+
+PAYMENT_EXECUTION_POLL_INTERVAL = 0.25
+# A claim untouched for this long belongs to a worker that died mid-way
+PAYMENT_EXECUTION_STALE_AFTER = timedelta(minutes=10)
+
+
+def _item_price():
+    # Unit price of a cart line for its purchase type, read from the product
+    return Case(
+        When(purchase_type="sib", then=F("product__price_sib")),
+        default=F("product__price_pdf"),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+
+
+def checkout(customer, paypal_payment_id=None, **order_fields):
+    """
+    Turn the customer's cart into an order in a single transaction.
+
+    The cart row is locked for the duration, so two concurrent checkouts of
+    the same cart cannot both succeed. Every order item keeps a snapshot of
+    the product price at checkout time, the order total is computed by the
+    database and the order is written once. Raises Cart.DoesNotExist when
+    the customer has no cart.
+    """
+    with transaction.atomic():
+        cart = Cart.objects.select_for_update().get(customer=customer)
+        cart_items = list(
+            CartItems.objects.filter(cart=cart)
+            .annotate(unit_price=Coalesce(_item_price(), Value(Decimal("0.00"))))
+            .values("product_id", "purchase_type", "quantity", "unit_price")
+        )
+
+        order = Order(
+            created_by=customer,
+            paypal_payment_id=paypal_payment_id,
+            final_total=Decimal("0.00"),
+            **order_fields,
+        )
+        order_items = [
+            OrderItems(
+                order=order,
+                cart=cart,
+                product_id=cart_item["product_id"],
+                purchase_type=cart_item["purchase_type"],
+                quantity=cart_item["quantity"],
+                sub_total=cart_item["quantity"] * cart_item["unit_price"],
+            )
+            for cart_item in cart_items
+        ]
+        order.final_total = CartItems.objects.filter(cart=cart).aggregate(
+            total=Coalesce(
+                Sum(F("quantity") * _item_price()),
+                Value(Decimal("0.00")),
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            )
+        )["total"]
+        order.save()
+        OrderItems.objects.bulk_create(order_items)
+        if order.payment_status == "Complete" and order_items:
+            record_order_sales(order, order_items)
+
+        # Clear the cart
+        CartItems.objects.filter(cart=cart).delete()
+        Cart.objects.filter(pk=cart.pk).update(grand_total=0, total_quantity=0)
+
+    return order
+
+
+class PaymentExecutionInProgress(Exception):
+    """Another request is still executing the same payment."""
+
+
+def try_claim_payment_execution(customer, payment_id):
+    """
+    Make one attempt at claiming the right to execute a PayPal payment.
+
+    Returns (execution, claimed), or (None, False) while another request is
+    still executing the payment.
+    """
+    while True:
+        try:
+            with transaction.atomic():
+                execution = PaymentExecution.objects.create(
+                    payment_id=payment_id, customer=customer
+                )
+            return execution, True
+        except IntegrityError:
+            pass
+
+        execution = PaymentExecution.objects.filter(payment_id=payment_id).first()
+        if execution is None:
+            # The first attempt failed and released its claim, try again
+            continue
+        if execution.status == "Complete" or execution.customer_id != customer.pk:
+            return execution, False
+
+        # A claim left behind by a dead worker is taken over
+        if execution.updated_at < timezone.now() - PAYMENT_EXECUTION_STALE_AFTER:
+            taken_over = PaymentExecution.objects.filter(
+                pk=execution.pk,
+                status="Processing",
+                updated_at=execution.updated_at,
+            ).update(updated_at=timezone.now())
+            if taken_over:
+                return execution, True
+            continue
+
+        return None, False
+
+
+async def claim_payment_execution(customer, payment_id):
+    """
+    Claim the right to execute a PayPal payment.
+
+    Returns (execution, claimed). When claimed is True the caller owns the
+    execution and must finish it with complete_payment_execution() or give it
+    up with release_payment_execution(). Otherwise the execution was already
+    completed (or belongs to another customer) and holds the stored result.
+    A duplicate that arrives while the payment is being executed waits for
+    the first request, up to PAYMENT_EXECUTION_WAIT_TIMEOUT seconds, and then
+    raises PaymentExecutionInProgress.
+    """
+    deadline = time.monotonic() + settings.PAYMENT_EXECUTION_WAIT_TIMEOUT
+    while True:
+        execution, claimed = await sync_to_async(try_claim_payment_execution)(
+            customer, payment_id
+        )
+        if execution is not None:
+            return execution, claimed
+        if time.monotonic() >= deadline:
+            raise PaymentExecutionInProgress
+        await asyncio.sleep(PAYMENT_EXECUTION_POLL_INTERVAL)
+
+
+def complete_payment_execution(execution, payment):
+    # Creates the order and stores the PayPal response in one transaction
+    with transaction.atomic():
+        order = checkout(
+            execution.customer,
+            paypal_payment_id=execution.payment_id,
+            payment_status="Complete",
+            payment_method="PayPal",
+        )
+        execution.order = order
+        execution.status = "Complete"
+        execution.payment = payment
+        execution.save(update_fields=["order", "status", "payment", "updated_at"])
+    return order
+
+
+def release_payment_execution(execution):
+    # Gives the claim up so a retry can execute the payment again
+    PaymentExecution.objects.filter(pk=execution.pk, status="Processing").delete()
@@ -1,7 +1,6 @@
 from django.urls import path
 from apps.order.views import (
-    # create_payment,
-    CreatePaymentView,
+    create_payment,
     execute_payment,
     OrderCreateView,
     OrderListView,
@@ -13,7 +12,7 @@ from apps.order.views import (
 
 urlpatterns = [
     path("create_order/", OrderCreateView.as_view(), name="create-order"),
-    path("payment_create/", CreatePaymentView.as_view(), name="payment-create"),
+    path("payment_create/", create_payment, name="payment-create"),
     path("payment_execute/", execute_payment),
     # path("payment_execute/", PaymentExecuteView.as_view(), name="payment_execute"),
     # path("payment_cancel/", PaymentCancelView.as_view(), name="payment_cancel"),
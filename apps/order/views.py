@@ -1,4 +1,5 @@
 from django.shortcuts import redirect, get_object_or_404
+from django.db.models import Prefetch
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
@@ -9,9 +10,18 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
 
 
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from music_sheet.authentication import JWTAuthentication
 
 from apps.order.models import Order, OrderItems
+from apps.order.gateways import PaymentGatewayError, get_payment_gateway
+from apps.order.services import (
+    checkout,
+    claim_payment_execution,
+    complete_payment_execution,
+    release_payment_execution,
+    PaymentExecutionInProgress,
+)
 from apps.order.serializers import (
     OrderSerializer,
     OrderItemsSerializer,
@@ -19,16 +29,18 @@ from apps.order.serializers import (
 )
 
 from apps.cart.models import Cart, CartItems
-from music_sheet.pagination import StandardResultsSetPagination
+from music_sheet.pagination import (
+    StandardResultsSetPagination,
+    NewestFirstCursorPagination,
+)
 from music_sheet.custom_permissions import OnlyCustomer, CustomerPermission
 
-from paypalrestsdk import Payment
+from asgiref.sync import sync_to_async
 
 import os
 import requests
 import json
-import paypalrestsdk
-from django.http import JsonResponse
+from django.http import HttpResponseNotAllowed, JsonResponse
 
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
@@ -43,76 +55,63 @@ def order_pdf_file_path(instance, filename):
     return os.path.join("uploads", "order_pdf_downloads", filename)
 
 
-paypalrestsdk.configure(
-    {
-        "mode": "sandbox",  # يمكن تعيين القيمة إلى 'live' في الإنتاج
-        "client_id": settings.PAYPAL_CLIENT_ID,
-        "client_secret": settings.PAYPAL_CLIENT_SECRET,
-    }
-)
+def authenticate_customer(request):
+    # Async views bypass DRF, so the JWT is checked here; returns (user, customer)
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None, None
+    if result is None:
+        return None, None
+    user = result[0]
+    if user.is_staff:
+        return user, None
+    return user, getattr(user, "customer", None)
+
+
+async def get_request_customer(request):
+    # Returns (customer, error response)
+    user, customer = await sync_to_async(authenticate_customer)(request)
+    if user is None:
+        return None, JsonResponse(
+            {"detail": _("User is not authenticated.")},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+    if customer is None:
+        return None, JsonResponse(
+            {"detail": _("You do not have permission to perform this action.")},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+    return customer, None
 
 
-@method_decorator(csrf_exempt, name="dispatch")
-class CreatePaymentView(APIView):
-    permission_classes = [OnlyCustomer]
-    authentication_classes = [JWTAuthentication]
+async def create_payment(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    customer, error_response = await get_request_customer(request)
+    if error_response is not None:
+        return error_response
 
-    def post(self, request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            return JsonResponse(
-                {"detail": _("User is not authenticated.")},
-                status=status.HTTP_401_UNAUTHORIZED,
-            )
-
-        customer = request.user.customer
-
-        # Fetch the grand_total from the cart
-        try:
-            cart = Cart.objects.get(customer=customer)
-            amount = (
-                cart.grand_total
-            )  # Assuming you have a grand_total field in your Cart model
-        except Cart.DoesNotExist:
-            return JsonResponse(
-                {"detail": _("Cart not found for the customer.")},
-                status=status.HTTP_404_NOT_FOUND,
-            )
-
-        # Create PayPal payment
-        payment = paypalrestsdk.Payment(
-            {
-                "intent": "sale",
-                "payer": {
-                    "payment_method": "paypal",
-                },
-                "redirect_urls": {
-                    "return_url": "https://music-score-pi.vercel.app/execute-payment/",
-                    "cancel_url": "https://music-score-pi.vercel.app/cancel-payment/",
-                },
-                "transactions": [
-                    {
-                        "amount": {
-                            "total": str(
-                                amount
-                            ),  # Convert amount to string as required by PayPal SDK
-                            "currency": "USD",
-                        },
-                        "description": "Payment for an item",
-                        "soft_descriptor": "Score",  # Set your custom soft descriptor here
-                    }
-                ],
-            }
+    # Fetch the grand_total from the cart
+    try:
+        cart = await Cart.objects.aget(customer=customer)
+    except Cart.DoesNotExist:
+        return JsonResponse(
+            {"detail": _("Cart not found for the customer.")},
+            status=status.HTTP_404_NOT_FOUND,
         )
 
-        if payment.create():
-            for link in payment.links:
-                if link.rel == "approval_url":
-                    approval_url = link.href
-                    return JsonResponse({"approval_url": approval_url})
-        else:
-            return JsonResponse(
-                {"error": payment.error}, status=status.HTTP_400_BAD_REQUEST
-            )
+    try:
+        approval_url = await get_payment_gateway().create_payment(cart.grand_total)
+    except PaymentGatewayError as e:
+        return JsonResponse({"error": e.detail}, status=e.status_code)
+    return JsonResponse({"approval_url": approval_url})
+
+
+# csrf_exempt() wraps views in a sync function on Django 4.1, which would
+# hide the coroutine, so the flag is set directly
+create_payment.csrf_exempt = True
 
 
 # @csrf_exempt
@@ -137,10 +136,14 @@ class CreatePaymentView(APIView):
 #         return JsonResponse({"error": payment.error})
 
 
-@csrf_exempt
-@api_view(["POST"])
-@permission_classes([IsAuthenticated])
-def execute_payment(request):
+async def execute_payment(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    customer, error_response = await get_request_customer(request)
+    if error_response is not None:
+        return error_response
+
     try:
         data = json.loads(request.body)
         payment_id = data.get("paymentId")
@@ -148,53 +151,67 @@ def execute_payment(request):
     except json.JSONDecodeError:
         return JsonResponse({"error": "Invalid JSON data"}, status=400)
 
-    payment = paypalrestsdk.Payment.find(payment_id)
-
-    if payment.execute({"payer_id": payer_id}):
-        customer = request.user.customer
-
-        # Create the order
-        order = Order.objects.create(
-            created_by=customer,
-            paypal_payment_id=payment_id,
-            payment_status="Complete",
-            payment_method="PayPal",
+    if not payment_id:
+        return JsonResponse({"error": "paymentId is required"}, status=400)
+
+    # A retried payment returns the order it already created
+    order = (
+        await Order.objects.select_related("payment_execution")
+        .filter(paypal_payment_id=payment_id)
+        .afirst()
+    )
+    if order is not None:
+        if order.created_by_id != customer.pk:
+            return JsonResponse({"error": "Payment not found."}, status=404)
+        execution = getattr(order, "payment_execution", None)
+        return executed_payment_response(
+            order.id, execution.payment if execution is not None else None
         )
 
-        # Add items from cart to order
-        try:
-            cart = Cart.objects.get(customer=customer)
-        except Cart.DoesNotExist:
-            return JsonResponse(
-                {"error": "Cart not found for the customer."}, status=404
-            )
-
-        total = 0
-        for cart_item in cart.items.all():
-            order_item = OrderItems.objects.create(
-                order=order,
-                cart=cart,
-                quantity=cart_item.quantity,
-                sub_total=cart_item.sub_total,
-                product=cart_item.product,
-                purchase_type=cart_item.purchase_type,
-            )
-            total += order_item.sub_total * order_item.quantity
-        cart.items.all().delete()  # Clear the cart
-
-        order.final_total = total
-        order.save()
-
-        # Return the full payment object
+    try:
+        execution, claimed = await claim_payment_execution(customer, payment_id)
+    except PaymentExecutionInProgress:
         return JsonResponse(
-            {
-                "status": "Payment executed successfully",
-                "payment": payment.to_dict(),  # Serialize the payment object
-                "order_id": order.id,
-            }
+            {"error": "Payment is still being processed, try again shortly."},
+            status=409,
         )
-    else:
-        return JsonResponse({"error": payment.error}, status=400)
+    if execution.customer_id != customer.pk:
+        return JsonResponse({"error": "Payment not found."}, status=404)
+    if not claimed:
+        if execution.order_id is None:
+            return JsonResponse({"error": "Order not found."}, status=404)
+        return executed_payment_response(execution.order_id, execution.payment)
+
+    try:
+        payment = await get_payment_gateway().execute_payment(payment_id, payer_id)
+
+        # Create the order from the cart
+        order = await sync_to_async(complete_payment_execution)(execution, payment)
+    except PaymentGatewayError as e:
+        await sync_to_async(release_payment_execution)(execution)
+        return JsonResponse({"error": e.detail}, status=e.status_code)
+    except Cart.DoesNotExist:
+        await sync_to_async(release_payment_execution)(execution)
+        return JsonResponse({"error": "Cart not found for the customer."}, status=404)
+    except Exception:
+        await sync_to_async(release_payment_execution)(execution)
+        raise
+
+    return executed_payment_response(order.id, payment)
+
+
+execute_payment.csrf_exempt = True
+
+
+def executed_payment_response(order_id, payment):
+    # Return the full payment object
+    return JsonResponse(
+        {
+            "status": "Payment executed successfully",
+            "payment": payment,
+            "order_id": order_id,
+        }
+    )
 
 
 # Order Views
@@ -205,24 +222,15 @@ class OrderCreateView(generics.CreateAPIView):
 
     def perform_create(self, serializer):
         customer = self.request.user.customer
-
-        order = serializer.save(created_by=customer)
-
-        # Add items from cart to order
-        cart = Cart.objects.get(customer=customer)
-        total = 0
-        for cart_item in cart.items.all():
-            order_item = OrderItems.objects.create(
-                order=order,
-                cart=cart,
-                quantity=cart_item.quantity,
-                sub_total=cart_item.sub_total,
-            )
-            total += order_item.sub_total * order_item.quantity
-        cart.items.all().delete()  # Clear the cart
-
-        order.final_total = total
-        order.save()
+        validated_data = serializer.validated_data
+
+        # Create the order from the cart
+        serializer.instance = checkout(
+            customer,
+            paypal_payment_id=validated_data.get("paypal_payment_id") or None,
+            payment_method=validated_data.get("payment_method", "PayPal"),
+            payment_status=validated_data.get("payment_status", "Pending"),
+        )
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -247,9 +255,29 @@ class CustomerOrdersListView(generics.ListAPIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [OnlyCustomer]
 
+    pagination_class = NewestFirstCursorPagination
+
     def get_queryset(self):
         customer = self.request.user.customer
-        return Order.objects.filter(created_by=customer).order_by("-created_at")
+        order_items = OrderItems.objects.select_related("product").only(
+            "id",
+            "cart",
+            "order",
+            "purchase_type",
+            "quantity",
+            "sub_total",
+            "product__name",
+            "product__name_ar",
+            "product__image",
+            "product__pdf_file",
+            "product__sib_file",
+        )
+        return (
+            Order.objects.filter(created_by=customer)
+            .select_related("created_by", "updated_by")
+            .prefetch_related(Prefetch("order_items", queryset=order_items))
+            .order_by("-created_at")
+        )
 
 
 class OrderRetrieve(generics.RetrieveAPIView):
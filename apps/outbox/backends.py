@@ -0,0 +1,46 @@
+import base64
+
+from django.core.mail.backends.base import BaseEmailBackend
+
+from apps.outbox.models import OutboxEmail
+
+
+def _encode_attachment(attachment):
+    filename, content, mimetype = attachment
+    if isinstance(content, str):
+        content = content.encode()
+    return [filename, base64.b64encode(content).decode("ascii"), mimetype]
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """
+    Email backend that only stores messages in the outbox, so sending
+    an email never waits on SMTP. The send_outbox_emails command delivers
+    them through OUTBOX_DELIVERY_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        emails = [
+            OutboxEmail(
+                subject=message.subject,
+                body=message.body,
+                from_email=message.from_email,
+                to=list(message.to),
+                cc=list(message.cc),
+                bcc=list(message.bcc),
+                reply_to=list(message.reply_to),
+                headers=dict(message.extra_headers),
+                alternatives=[
+                    list(alternative)
+                    for alternative in getattr(message, "alternatives", [])
+                ],
+                attachments=[
+                    _encode_attachment(attachment)
+                    for attachment in message.attachments
+                ],
+            )
+            for message in email_messages
+            if message.recipients()
+        ]
+        OutboxEmail.objects.bulk_create(emails)
+        return len(emails)
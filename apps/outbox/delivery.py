@@ -0,0 +1,133 @@
+import base64
+import logging
+import smtplib
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.utils import timezone
+
+from apps.outbox.models import OutboxEmail
+
+
+logger = logging.getLogger(__name__)
+
+# A claimed email nobody finished within this time is picked up again
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def _claim_batch(batch_size):
+    # Two queries instead of SELECT ... FOR UPDATE, several workers may run
+    # at once on any database and each email is only claimed by one of them
+    now = timezone.now()
+    ids = list(
+        OutboxEmail.objects.filter(status="Pending", next_attempt_at__lte=now)
+        .order_by("next_attempt_at")
+        .values_list("id", flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+
+    claim = uuid.uuid4()
+    OutboxEmail.objects.filter(
+        id__in=ids, status="Pending", next_attempt_at__lte=now
+    ).update(claim=claim, next_attempt_at=now + CLAIM_TIMEOUT)
+    return list(OutboxEmail.objects.filter(claim=claim).order_by("next_attempt_at"))
+
+
+def _build_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+        cc=email.cc,
+        bcc=email.bcc,
+        reply_to=email.reply_to,
+        headers=email.headers,
+        alternatives=[tuple(alternative) for alternative in email.alternatives],
+        connection=connection,
+    )
+    for filename, content, mimetype in email.attachments:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+def retry_delay(attempts):
+    # Exponential backoff, OUTBOX_RETRY_DELAY seconds after the first failure
+    return timedelta(seconds=settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def _mark_failed(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    email.claim = None
+    if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        email.status = "Failed"
+        logger.error(f"Giving up on outbox email {email.id}: {error}")
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+    email.save(
+        update_fields=["attempts", "last_error", "claim", "status", "next_attempt_at"]
+    )
+
+
+def _is_connection_error(error):
+    # SMTPException subclasses OSError, most of them only concern one message
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+def _put_back(emails):
+    # Unclaimed again without counting an attempt against them
+    OutboxEmail.objects.filter(id__in=[email.id for email in emails]).update(
+        claim=None, next_attempt_at=timezone.now() + retry_delay(1)
+    )
+
+
+def send_outbox_emails(batch_size=None):
+    """
+    Deliver one batch of due emails over a single connection and return
+    (sent, failed). Failed emails are retried with exponential backoff up to
+    OUTBOX_MAX_ATTEMPTS times. When the server cannot be reached the rest of
+    the batch is put back without counting an attempt against it.
+    """
+    emails = _claim_batch(batch_size or settings.OUTBOX_BATCH_SIZE)
+    if not emails:
+        return 0, 0
+
+    sent_ids = []
+    failed = 0
+    connection = get_connection(settings.OUTBOX_DELIVERY_BACKEND)
+    try:
+        # Opened here, otherwise every send() opens and closes a connection
+        # of its own
+        connection.open()
+    except Exception as error:
+        # e.g. the server is down or refused the login, none was sent
+        logger.warning(f"Outbox delivery could not connect: {error}")
+        _put_back(emails)
+        return 0, 0
+
+    try:
+        for index, email in enumerate(emails):
+            try:
+                _build_message(email, connection).send()
+            except Exception as error:
+                failed += 1
+                _mark_failed(email, error)
+                if _is_connection_error(error):
+                    logger.warning(f"Outbox delivery interrupted: {error}")
+                    _put_back(emails[index + 1 :])
+                    break
+            else:
+                sent_ids.append(email.id)
+    finally:
+        connection.close()
+        OutboxEmail.objects.filter(id__in=sent_ids).update(
+            status="Sent", sent_at=timezone.now(), claim=None
+        )
+
+    return len(sent_ids), failed
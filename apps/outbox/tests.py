@@ -0,0 +1,97 @@
+import smtplib
+from datetime import timedelta
+from unittest import mock
+
+from django.core.mail import send_mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.outbox.delivery import send_outbox_emails
+from apps.outbox.models import OutboxEmail
+
+
+@override_settings(
+    EMAIL_BACKEND="apps.outbox.backends.OutboxEmailBackend",
+    OUTBOX_DELIVERY_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+    OUTBOX_MAX_ATTEMPTS=5,
+    OUTBOX_RETRY_DELAY=60,
+    EMAIL_HOST="127.0.0.1",
+    EMAIL_PORT=1025,
+    EMAIL_USE_TLS=False,
+    EMAIL_USE_SSL=False,
+    EMAIL_HOST_USER="",
+)
+class SendOutboxEmailsTests(TestCase):
+    # smtplib.SMTP is replaced by a stub server, every instance is one
+    # connection to it
+
+    def setUp(self):
+        for number in range(3):
+            send_mail(
+                f"Subject {number}", "Body", "from@example.com", ["to@example.com"]
+            )
+        patcher = mock.patch("smtplib.SMTP")
+        self.smtp = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = self.smtp.return_value
+        self.server.sendmail.return_value = {}
+
+    def test_batch_is_sent_over_one_connection(self):
+        self.assertEqual(send_outbox_emails(), (3, 0))
+
+        self.assertEqual(self.smtp.call_count, 1)
+        self.assertEqual(self.server.sendmail.call_count, 3)
+        self.assertEqual(self.server.quit.call_count, 1)
+        self.assertEqual(OutboxEmail.objects.filter(status="Sent").count(), 3)
+
+    def test_unreachable_server_puts_the_batch_back(self):
+        self.smtp.side_effect = ConnectionRefusedError()
+        before = timezone.now()
+
+        self.assertEqual(send_outbox_emails(), (0, 0))
+
+        for email in OutboxEmail.objects.all():
+            self.assertEqual(email.status, "Pending")
+            self.assertEqual(email.attempts, 0)
+            self.assertIsNone(email.claim)
+            self.assertGreaterEqual(
+                email.next_attempt_at, before + timedelta(seconds=60)
+            )
+
+    def test_dropped_connection_backs_off_and_puts_the_rest_back(self):
+        self.server.sendmail.side_effect = [
+            {},
+            smtplib.SMTPServerDisconnected("Connection unexpectedly closed"),
+        ]
+        before = timezone.now()
+
+        self.assertEqual(send_outbox_emails(), (1, 1))
+
+        self.assertEqual(self.smtp.call_count, 1)
+        emails = OutboxEmail.objects.order_by("subject")
+        self.assertEqual(emails[0].status, "Sent")
+        self.assertEqual(emails[1].status, "Pending")
+        self.assertEqual(emails[1].attempts, 1)
+        self.assertIn("unexpectedly closed", emails[1].last_error)
+        self.assertEqual(emails[2].attempts, 0)
+        for email in emails[1:]:
+            self.assertIsNone(email.claim)
+            self.assertGreaterEqual(
+                email.next_attempt_at, before + timedelta(seconds=60)
+            )
+
+        # Not due before the backoff ran out
+        self.assertEqual(send_outbox_emails(), (0, 0))
+
+    def test_failures_back_off_exponentially(self):
+        self.server.sendmail.side_effect = smtplib.SMTPRecipientsRefused({})
+        OutboxEmail.objects.update(attempts=2)
+        before = timezone.now()
+
+        self.assertEqual(send_outbox_emails(), (0, 3))
+
+        for email in OutboxEmail.objects.all():
+            self.assertEqual(email.attempts, 3)
+            self.assertGreaterEqual(
+                email.next_attempt_at, before + timedelta(seconds=60 * 2**2)
+            )
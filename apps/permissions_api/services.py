@@ -0,0 +1,122 @@
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+
+from user.models import User
+from user.permission_cache import bump_user_permission_version
+
+
+# Group and permission assignments are written straight to the through
+# tables, one INSERT or DELETE per call. That skips m2m_changed, so the
+# permission cache of the affected users is bumped here instead.
+UserGroup = User.groups.through
+UserPermission = User.user_permissions.through
+
+
+def _bust_permission_cache(user_ids):
+    # Request ids may be spelled differently than the str(user.pk) the cache
+    # keys are made from, e.g. uppercase or without hyphens
+    user_ids = [User._meta.pk.to_python(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: bump_user_permission_version(*user_ids))
+
+
+def get_group_ids(names):
+    # Ids of the named groups and the names that matched no group
+    groups = dict(Group.objects.filter(name__in=names).values_list("name", "id"))
+    return list(set(groups.values())), sorted(set(names) - set(groups))
+
+
+def get_permission_ids(codenames):
+    # Ids of the permissions with these codenames (a codename may be used by
+    # several apps) and the codenames that matched no permission
+    permissions = list(
+        Permission.objects.filter(codename__in=codenames).values_list("codename", "id")
+    )
+    ids = [permission_id for _, permission_id in permissions]
+    found = {codename for codename, _ in permissions}
+    return ids, sorted(set(codenames) - found)
+
+
+def add_users_to_groups(user_ids, group_ids):
+    UserGroup.objects.bulk_create(
+        [
+            UserGroup(user_id=user_id, group_id=group_id)
+            for user_id in user_ids
+            for group_id in group_ids
+        ],
+        ignore_conflicts=True,
+    )
+    _bust_permission_cache(user_ids)
+
+
+def remove_users_from_groups(user_ids, group_ids):
+    UserGroup.objects.filter(user_id__in=user_ids, group_id__in=group_ids).delete()
+    _bust_permission_cache(user_ids)
+
+
+def set_user_groups(user_id, group_ids):
+    UserGroup.objects.filter(user_id=user_id).exclude(group_id__in=group_ids).delete()
+    add_users_to_groups([user_id], group_ids)
+
+
+def add_user_permissions(user_id, permission_ids):
+    UserPermission.objects.bulk_create(
+        [
+            UserPermission(user_id=user_id, permission_id=permission_id)
+            for permission_id in permission_ids
+        ],
+        ignore_conflicts=True,
+    )
+    _bust_permission_cache([user_id])
+
+
+def remove_user_permissions(user_id, permission_ids):
+    UserPermission.objects.filter(
+        user_id=user_id, permission_id__in=permission_ids
+    ).delete()
+    _bust_permission_cache([user_id])
+
+
+def permission_matrix(users):
+    """
+    Return the groups with their permissions and the given users with their
+    groups and permissions, in three queries.
+    """
+    groups = {}
+    for group_id, name, codename in Group.objects.values_list(
+        "id", "name", "permissions__codename"
+    ).order_by("name"):
+        group = groups.setdefault(
+            group_id, {"id": group_id, "name": name, "permissions": []}
+        )
+        if codename:
+            group["permissions"].append(codename)
+
+    rows = {}
+    for user_id, name, email, group_id in users.values_list(
+        "id", "name", "email", "groups"
+    ).order_by("name"):
+        row = rows.setdefault(
+            user_id,
+            {
+                "id": user_id,
+                "name": name,
+                "email": email,
+                "groups": [],
+                "user_permissions": [],
+            },
+        )
+        if group_id:
+            row["groups"].append(group_id)
+
+    for user_id, codename in UserPermission.objects.filter(
+        user__in=users
+    ).values_list("user_id", "permission__codename"):
+        rows[user_id]["user_permissions"].append(codename)
+
+    for row in rows.values():
+        permissions = set(row["user_permissions"])
+        for group_id in row["groups"]:
+            permissions.update(groups[group_id]["permissions"])
+        row["permissions"] = sorted(permissions)
+
+    return {"groups": list(groups.values()), "users": list(rows.values())}
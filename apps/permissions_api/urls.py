@@ -16,6 +16,7 @@ from apps.permissions_api.views import (
     RemoveUserFromGroupView,
     RemoveManyUsersFromGroupView,
     GroupDialogView,
+    PermissionMatrixView,
 )
 
 
@@ -25,6 +26,9 @@ urlpatterns = [
     path(
         "permissions_dialog/", PermissionDialogView.as_view(), name="permission-dialog"
     ),
+    path(
+        "permission_matrix/", PermissionMatrixView.as_view(), name="permission-matrix"
+    ),
     path(
         "assign_permissions_to_group/",
         AssignPermissionsToGroupView.as_view(),
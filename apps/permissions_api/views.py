@@ -1,4 +1,5 @@
 from django.contrib.auth.models import Permission, Group
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 from django.shortcuts import get_object_or_404
 
@@ -6,7 +7,7 @@ from rest_framework.response import Response
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from music_sheet.authentication import JWTAuthentication
 
 from apps.permissions_api.serializers import (
     PermissionSerializer,
@@ -14,6 +15,14 @@ from apps.permissions_api.serializers import (
     PermissionDialogSerializer,
     GroupDialogSerializer,
 )
+from apps.permissions_api.services import (
+    add_user_permissions,
+    add_users_to_groups,
+    get_permission_ids,
+    permission_matrix,
+    remove_user_permissions,
+    remove_users_from_groups,
+)
 from music_sheet.pagination import StandardResultsSetPagination
 from user.models import User
 from user.serializers import UserSerializer
@@ -50,8 +59,13 @@ class AssignPermissionsToGroupView(generics.CreateAPIView):
                 {"detail": _("Group not found")}, status=status.HTTP_404_NOT_FOUND
             )
 
-        permissions = Permission.objects.filter(codename__in=permission_codenames)
-        group.permissions.set(permissions)
+        permission_ids, missing = get_permission_ids(permission_codenames)
+        if missing:
+            return Response(
+                {"detail": _("Permissions not found: {}").format(", ".join(missing))},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        group.permissions.set(permission_ids)
 
         return Response(
             {"detail": _("Permission(s) assigned to group successfully")},
@@ -67,15 +81,18 @@ class AssignPermissionsToUserView(generics.CreateAPIView):
         user_id = request.query_params.get("user_id")
         permission_codenames = request.data.get("codename", [])
 
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
+        if not User.objects.filter(id=user_id).exists():
             return Response(
                 {"detail": _("User not found")}, status=status.HTTP_404_NOT_FOUND
             )
 
-        permissions = Permission.objects.filter(codename__in=permission_codenames)
-        user.user_permissions.add(*permissions)
+        permission_ids, missing = get_permission_ids(permission_codenames)
+        if missing:
+            return Response(
+                {"detail": _("Permissions not found: {}").format(", ".join(missing))},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        add_user_permissions(user_id, permission_ids)
 
         return Response(
             {"detail": _("Permission(s) assigned to user successfully")},
@@ -98,8 +115,13 @@ class RemovePermissionsFromGroupView(generics.UpdateAPIView):
                 {"detail": _("Group not found")}, status=status.HTTP_404_NOT_FOUND
             )
 
-        permissions = Permission.objects.filter(codename__in=permission_codenames)
-        group.permissions.remove(*permissions)
+        permission_ids, missing = get_permission_ids(permission_codenames)
+        if missing:
+            return Response(
+                {"detail": _("Permissions not found: {}").format(", ".join(missing))},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        group.permissions.remove(*permission_ids)
 
         return Response(
             {"detail": _("Permission(s) removed from group successfully")},
@@ -115,15 +137,18 @@ class RemovePermissionsFromUserView(generics.UpdateAPIView):
         user_id = request.query_params.get("user_id")
         permission_codenames = request.data.get("codename", [])
 
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
+        if not User.objects.filter(id=user_id).exists():
             return Response(
-                {"detail": _("Group not found")}, status=status.HTTP_404_NOT_FOUND
+                {"detail": _("User not found")}, status=status.HTTP_404_NOT_FOUND
             )
 
-        permissions = Permission.objects.filter(codename__in=permission_codenames)
-        user.user_permissions.remove(*permissions)
+        permission_ids, missing = get_permission_ids(permission_codenames)
+        if missing:
+            return Response(
+                {"detail": _("Permissions not found: {}").format(", ".join(missing))},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        remove_user_permissions(user_id, permission_ids)
 
         return Response(
             {"detail": _("Permission(s) removed from user successfully")},
@@ -133,7 +158,7 @@ class RemovePermissionsFromUserView(generics.UpdateAPIView):
 
 # Groups Views
 class GroupListView(generics.ListAPIView):
-    queryset = Group.objects.all()
+    queryset = Group.objects.prefetch_related("permissions")
     serializer_class = GroupSerializer
     authentication_classes = [JWTAuthentication]
     permission_classes = [CustomerPermission]
@@ -148,14 +173,19 @@ class GroupCreateView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         group_serializer = self.get_serializer(data=request.data)
         group_serializer.is_valid(raise_exception=True)
-        group = group_serializer.save()
 
         permission_codenames = request.data.get("permissions", [])
-        if permission_codenames:
-            permissions = Permission.objects.filter(codename__in=permission_codenames)
+        permission_ids, missing = get_permission_ids(permission_codenames)
+        if missing:
+            return Response(
+                {"detail": _("Permissions not found: {}").format(", ".join(missing))},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
+        with transaction.atomic():
+            group = group_serializer.save()
             # Assign permissions to the group
-            group.permissions.add(*permissions)
+            group.permissions.add(*permission_ids)
 
         return Response(
             {"detail": _("Group created successfully")}, status=status.HTTP_201_CREATED
@@ -200,9 +230,13 @@ class GroupDeleteView(generics.DestroyAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        for group_id in group_ids:
-            group = get_object_or_404(Group, id=group_id)
-            group.delete()
+        groups = Group.objects.filter(id__in=group_ids)
+        if groups.count() != len(set(group_ids)):
+            return Response(
+                {"detail": _("One or more groups not found")},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        groups.delete()
 
         return Response(
             {"detail": _("Groups permanently deleted successfully")},
@@ -226,20 +260,16 @@ class AssignUserToGroupView(generics.UpdateAPIView):
         user_id = self.request.query_params.get("user_id")
         group_id = request.data.get("group_id")
 
-        try:
-            user = User.objects.get(id=user_id)
-            group = Group.objects.get(id=group_id)
-        except User.DoesNotExist:
+        if not User.objects.filter(id=user_id).exists():
             return Response(
                 {"detail": _("User not found")}, status=status.HTTP_404_NOT_FOUND
             )
-        except Group.DoesNotExist:
+        if not Group.objects.filter(id=group_id).exists():
             return Response(
                 {"detail": _("Group not found")}, status=status.HTTP_404_NOT_FOUND
             )
 
-        user.groups.add(group)
-        user.save()
+        add_users_to_groups([user_id], [group_id])
 
         return Response(
             {"detail": _("User assigned to group successfully")},
@@ -263,18 +293,15 @@ class AssignManyUsersToGroupView(generics.UpdateAPIView):
                 {"detail": _("Group not found")}, status=status.HTTP_404_NOT_FOUND
             )
 
-        users = User.objects.filter(id__in=user_ids)
-        users_count = users.count()
+        users_count = User.objects.filter(id__in=user_ids).count()
 
-        if users_count != len(user_ids):
+        if users_count != len(set(user_ids)):
             return Response(
                 {"detail": _("One or more users not found")},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        for user in users:
-            user.groups.add(group)
-            user.save()
+        add_users_to_groups(user_ids, [group.id])
 
         return Response(
             {"detail": _("Users assigned to group successfully")},
@@ -292,19 +319,15 @@ class RemoveUserFromGroupView(generics.UpdateAPIView):
         user_id = self.request.query_params.get("user_id")
         group_id = request.data.get("group_id")
 
-        try:
-            user = User.objects.get(id=user_id)
-            group = Group.objects.get(id=group_id)
-        except User.DoesNotExist:
+        if not User.objects.filter(id=user_id).exists():
             return Response(
                 {"detail": _("User not found")}, status=status.HTTP_404_NOT_FOUND
             )
-        except Group.DoesNotExist:
+        if not Group.objects.filter(id=group_id).exists():
             return Response(
                 {"detail": _("Group not found")}, status=status.HTTP_404_NOT_FOUND
             )
-        user.groups.remove(group)
-        user.save()
+        remove_users_from_groups([user_id], [group_id])
 
         return Response(
             {"detail": _("User removed from group successfully")},
@@ -328,20 +351,27 @@ class RemoveManyUsersFromGroupView(generics.UpdateAPIView):
                 {"detail": _("Group not found")}, status=status.HTTP_404_NOT_FOUND
             )
 
-        users = User.objects.filter(id__in=user_ids)
-        users_count = users.count()
+        users_count = User.objects.filter(id__in=user_ids).count()
 
-        if users_count != len(user_ids):
+        if users_count != len(set(user_ids)):
             return Response(
                 {"detail": _("One or more users not found")},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        for user in users:
-            user.groups.remove(group)
-            user.save()
+        remove_users_from_groups(user_ids, [group.id])
 
         return Response(
             {"detail": _("Users removed from group successfully")},
             status=status.HTTP_204_NO_CONTENT,
         )
+
+
+class PermissionMatrixView(generics.GenericAPIView):
+    # Staff users with their groups and permissions for the admin screens
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [CustomerPermission]
+
+    def get(self, request, *args, **kwargs):
+        users = User.objects.filter(is_deleted=False, is_superuser=False, is_staff=True)
+        return Response(permission_matrix(users))
@@ -0,0 +1,128 @@
+import uuid
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Func, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.category.models import Category
+from apps.category.tree import bump_category_tree_version
+from apps.product.models import Product
+from apps.section.models import Section
+
+
+ProductCategory = Product.category.through
+
+
+def _count(products):
+    # COUNT(DISTINCT id) of the products as a correlated subquery, a product
+    # filed under several subcategories is counted once
+    return Coalesce(
+        Subquery(
+            products.order_by()
+            .annotate(
+                count=Func(
+                    F("pk"),
+                    function="COUNT",
+                    template="%(function)s(DISTINCT %(expressions)s)",
+                )
+            )
+            .values("count"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def category_path_ids(path):
+    # Ids of the categories on a materialized path, the last one included
+    return [uuid.UUID(part) for part in path.split("/") if part]
+
+
+def recount_categories(category_ids):
+    """
+    Recount the products of the categories and all their ancestors with one
+    UPDATE.
+    """
+    category_ids = set(category_ids)
+    if not category_ids:
+        return
+    ids = set(category_ids)
+    for path in Category.objects.filter(pk__in=category_ids).values_list(
+        "path", flat=True
+    ):
+        ids.update(category_path_ids(path))
+
+    products = Product.objects.filter(
+        is_deleted=False, category__path__startswith=OuterRef("path")
+    )
+    # An empty path would match every product, rebuild_category_paths first
+    Category.objects.filter(pk__in=ids).exclude(path="").update(
+        product_count=_count(products),
+        active_product_count=_count(products.filter(is_active=True)),
+    )
+    transaction.on_commit(bump_category_tree_version)
+
+
+def recount_sections(section_ids):
+    section_ids = set(section_ids) - {None}
+    if not section_ids:
+        return
+    products = Product.objects.filter(is_deleted=False, section=OuterRef("pk"))
+    Section.objects.filter(pk__in=section_ids).update(
+        product_count=_count(products),
+        active_product_count=_count(products.filter(is_active=True)),
+    )
+
+
+def _expected_category_counts():
+    paths = dict(Category.objects.values_list("pk", "path"))
+    products = defaultdict(set)
+    active = defaultdict(set)
+    for category_id, product_id, is_active in ProductCategory.objects.filter(
+        product__is_deleted=False
+    ).values_list("category_id", "product_id", "product__is_active"):
+        for ancestor_id in category_path_ids(paths[category_id]) or [category_id]:
+            products[ancestor_id].add(product_id)
+            if is_active:
+                active[ancestor_id].add(product_id)
+    return {
+        category_id: (len(products[category_id]), len(active[category_id]))
+        for category_id in paths
+    }
+
+
+def _expected_section_counts():
+    return {
+        row["section"]: (row["total"], row["active"])
+        for row in Product.objects.filter(is_deleted=False, section__isnull=False)
+        .values("section")
+        .annotate(total=Count("pk"), active=Count("pk", filter=Q(is_active=True)))
+    }
+
+
+def _drifted(model, expected):
+    drifted = []
+    for obj in model.objects.only("pk", "product_count", "active_product_count"):
+        counts = expected.get(obj.pk, (0, 0))
+        if (obj.product_count, obj.active_product_count) != counts:
+            obj.product_count, obj.active_product_count = counts
+            drifted.append(obj)
+    return drifted
+
+
+def check_product_counts(fix=True):
+    """
+    Compare the stored product counts with a full recount and, unless fix is
+    False, correct the ones that drifted. Returns the drifted categories and
+    sections.
+    """
+    categories = _drifted(Category, _expected_category_counts())
+    sections = _drifted(Section, _expected_section_counts())
+    if fix:
+        fields = ["product_count", "active_product_count"]
+        Category.objects.bulk_update(categories, fields, batch_size=500)
+        Section.objects.bulk_update(sections, fields, batch_size=500)
+        if categories:
+            bump_category_tree_version()
+    return categories, sections
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from apps.product.counts import check_product_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the products of every category and section and correct the "
+        "stored counts that drifted. Meant to run periodically, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the drifted counts.",
+        )
+
+    def handle(self, *args, **options):
+        categories, sections = check_product_counts(fix=not options["dry_run"])
+        for label, objs in (("category", categories), ("section", sections)):
+            for obj in objs:
+                self.stdout.write(
+                    f"{label} {obj.pk}: {obj.product_count} products, "
+                    f"{obj.active_product_count} active"
+                )
+        verb = "Found" if options["dry_run"] else "Corrected"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {len(categories)} category and {len(sections)} section counts."
+            )
+        )
@@ -0,0 +1,171 @@
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.db.models import Avg, F, FloatField, OuterRef, Subquery, Window
+from django.db.models.functions import RowNumber
+
+from apps.category.models import Category
+from apps.product.counts import ProductCategory
+from apps.product.models import Product
+from apps.rating.models import Rating
+from apps.section.models import Section
+
+
+# Cached shelves are keyed by a version that product changes replace, see
+# apps.product.signals. Ratings and views only reach them through the TTL.
+SHELVES_VERSION_KEY = "product_shelves:version"
+
+SHELF_GROUPS = {"category": Category, "section": Section}
+# Order of the products on a shelf, ties broken by the newest
+SHELF_ORDERS = {
+    "newest": [],
+    "rating": ["-avg_stars"],
+    "popular": ["-views_num"],
+}
+SHELF_PRODUCT_FIELDS = (
+    "id",
+    "name",
+    "name_ar",
+    "slug",
+    "image",
+    "price_pdf",
+    "price_sib",
+    "views_num",
+)
+
+
+def _shelves_version():
+    version = cache.get(SHELVES_VERSION_KEY)
+    if version is None:
+        cache.add(SHELVES_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(SHELVES_VERSION_KEY)
+    return version
+
+
+def bump_product_shelves_version():
+    cache.set(SHELVES_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def _average_stars(product_ref):
+    return Subquery(
+        Rating.objects.filter(product=OuterRef(product_ref))
+        .order_by()
+        .values("product")
+        .annotate(avg=Avg("stars"))
+        .values("avg"),
+        output_field=FloatField(),
+    )
+
+
+def _placements(group):
+    # (group id, product id) of the visible products, the product fields
+    # reachable through prefix for ordering
+    if group == "category":
+        placements = ProductCategory.objects.filter(
+            product__is_active=True,
+            product__is_deleted=False,
+            category__is_active=True,
+            category__is_deleted=False,
+        ).annotate(avg_stars=_average_stars("product_id"))
+        return placements, "category_id", "product_id", "product__"
+    placements = Product.objects.filter(
+        is_active=True,
+        is_deleted=False,
+        section__is_active=True,
+        section__is_deleted=False,
+    ).annotate(avg_stars=_average_stars("pk"))
+    return placements, "section_id", "id", ""
+
+
+def _order_by(order, prefix):
+    ordering = []
+    for name in SHELF_ORDERS[order] + ["-created_at", "id"]:
+        descending = name.startswith("-")
+        name = name.lstrip("-")
+        # avg_stars is annotated on the placements themselves
+        field = F(name if name == "avg_stars" else f"{prefix}{name}")
+        ordering.append(field.desc(nulls_last=True) if descending else field.asc())
+    return ordering
+
+
+def _ranked_placements(group, order, limit):
+    placements, group_field, product_field, prefix = _placements(group)
+    ordering = _order_by(order, prefix)
+    connection = connections[placements.db]
+    if not connection.features.supports_over_clause:
+        # Every placement in shelf order, cut to the first limit per group
+        taken = defaultdict(int)
+        for group_id, product_id in placements.order_by(
+            group_field, *ordering
+        ).values_list(group_field, product_field):
+            if taken[group_id] < limit:
+                taken[group_id] += 1
+                yield group_id, product_id
+        return
+
+    # Window functions can not be filtered on directly, the ranked rows are
+    # cut to the first limit per group by an outer query
+    ranked = placements.order_by().annotate(
+        shelf_rank=Window(
+            RowNumber(), partition_by=[F(group_field)], order_by=ordering
+        )
+    )
+    sql, params = ranked.values_list(
+        group_field, product_field, "shelf_rank"
+    ).query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT * FROM ({sql}) ranked WHERE shelf_rank <= %s "
+            f"ORDER BY shelf_rank",
+            (*params, limit),
+        )
+        rows = cursor.fetchall()
+    # Raw rows hold what the database returns, e.g. hex strings on SQLite
+    group_pk = SHELF_GROUPS[group]._meta.pk
+    for group_id, product_id, _ in rows:
+        yield group_pk.to_python(group_id), Product._meta.pk.to_python(product_id)
+
+
+def _build_shelves(group, order, limit):
+    placements = list(_ranked_placements(group, order, limit))
+    products = {
+        row["id"]: {
+            **row,
+            "id": str(row["id"]),
+            "image": default_storage.url(row["image"]) if row["image"] else None,
+        }
+        for row in Product.objects.filter(
+            pk__in={product_id for _, product_id in placements}
+        )
+        .annotate(avg_ratings=Avg("ratings__stars"))
+        .values(*SHELF_PRODUCT_FIELDS, "avg_ratings")
+    }
+    shelves = {
+        row["id"]: {**row, "id": str(row["id"]), "products": []}
+        for row in SHELF_GROUPS[group]
+        .objects.filter(pk__in={group_id for group_id, _ in placements})
+        .order_by("-created_at")
+        .values("id", "name", "name_ar", "slug")
+    }
+    for group_id, product_id in placements:
+        shelves[group_id]["products"].append(products[product_id])
+    return list(shelves.values())
+
+
+def product_shelves(group="category", order="newest", limit=10):
+    """
+    Return the first limit products of every category or section, in the
+    given order, as [{"id", "name", "name_ar", "slug", "products": [...]}].
+    The products are ranked with ROW_NUMBER() in one query, or in Python on
+    databases without window functions. Cached until a product changes.
+    """
+    key = f"product_shelves:{_shelves_version()}:{group}:{order}:{limit}"
+    shelves = cache.get(key)
+    if shelves is None:
+        shelves = _build_shelves(group, order, limit)
+        cache.set(key, shelves, settings.PRODUCT_SHELVES_CACHE_TTL)
+    return shelves
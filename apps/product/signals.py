@@ -0,0 +1,120 @@
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from apps.category.models import Category
+from apps.product.counts import (
+    ProductCategory,
+    category_path_ids,
+    recount_categories,
+    recount_sections,
+)
+from apps.product.models import Product
+from apps.product.shelves import bump_product_shelves_version
+from apps.section.models import Section
+
+# The product counts of categories and sections depend on these
+COUNTED_FIELDS = ("section", "section_id", "is_active", "is_deleted")
+
+
+def _category_ids(product):
+    return list(
+        ProductCategory.objects.filter(product=product).values_list(
+            "category_id", flat=True
+        )
+    )
+
+
+@receiver(pre_save, sender=Product)
+def remember_counted_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._counted = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not set(update_fields) & set(COUNTED_FIELDS):
+        # e.g. the views_num increment of every product page
+        return
+    instance._counted = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("section_id", "is_active", "is_deleted")
+        .first()
+    )
+
+
+@receiver(post_save, sender=Product)
+def update_counts_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    counted = (instance.section_id, instance.is_active, instance.is_deleted)
+    if created:
+        recount_sections([instance.section_id])
+        return
+    previous = getattr(instance, "_counted", None)
+    if previous is None or previous == counted:
+        return
+    recount_sections([previous[0], instance.section_id])
+    if previous[1:] != counted[1:]:
+        recount_categories(_category_ids(instance))
+
+
+@receiver(m2m_changed, sender=ProductCategory)
+def update_counts_on_category_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action == "pre_clear":
+        # Nothing is left to tell which categories lost products afterwards
+        instance._cleared_categories = (
+            [instance.pk] if reverse else _category_ids(instance)
+        )
+    elif action == "post_clear":
+        recount_categories(instance.__dict__.pop("_cleared_categories", []))
+    elif action in ("post_add", "post_remove") and pk_set:
+        recount_categories([instance.pk] if reverse else pk_set)
+
+
+@receiver(pre_delete, sender=Product)
+def remember_product_categories(sender, instance, **kwargs):
+    instance._deleted_categories = _category_ids(instance)
+
+
+@receiver(post_delete, sender=Product)
+def update_counts_on_delete(sender, instance, **kwargs):
+    recount_sections([instance.section_id])
+    recount_categories(getattr(instance, "_deleted_categories", []))
+
+
+@receiver(post_save, sender=Category)
+def update_counts_on_category_move(sender, instance, raw=False, **kwargs):
+    previous_path = getattr(instance, "_previous_path", "")
+    if raw or not previous_path or previous_path == instance.path:
+        return
+    # The old ancestors lost the subtree's products, the new ones gained them
+    recount_categories(
+        category_path_ids(previous_path)[:-1] + category_path_ids(instance.path)
+    )
+
+
+@receiver(post_delete, sender=Category)
+def update_counts_on_category_delete(sender, instance, **kwargs):
+    recount_categories(category_path_ids(instance.path)[:-1])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(m2m_changed, sender=ProductCategory)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+def invalidate_product_shelves(sender, update_fields=None, action="post_", **kwargs):
+    if not action.startswith("post_"):
+        return
+    if update_fields is not None and set(update_fields) <= {"views_num"}:
+        # Views reach the shelves through PRODUCT_SHELVES_CACHE_TTL
+        return
+    transaction.on_commit(bump_product_shelves_version)
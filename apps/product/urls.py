@@ -7,6 +7,7 @@ from apps.product.views import (
     ProductListView,
     DeletedProductListView,
     ProductByCategoryView,
+    ProductShelvesView,
     ProductRetrieveView,
     ProductActiveListView,
     ProductActiveRetrieveView,
@@ -48,6 +49,11 @@ urlpatterns = [
         ProductByCategoryView.as_view(),
         name="product-by-category",
     ),
+    path(
+        "product_shelves/",
+        ProductShelvesView.as_view(),
+        name="product-shelves",
+    ),
     path("product_retrieve/", ProductRetrieveView.as_view(), name="product-retrieve"),
     path(
         "product_active_list/",
@@ -14,7 +14,7 @@ from rest_framework import (
     generics,
     status,
 )
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from music_sheet.authentication import JWTAuthentication
 
 from apps.product.models import Product
 from apps.product.serializers import (
@@ -26,6 +26,7 @@ from apps.product.serializers import (
     ProductCategoryBulkSerializer,
 )
 from apps.product.filters import ProductFilter
+from apps.product.shelves import SHELF_GROUPS, SHELF_ORDERS, product_shelves
 from music_sheet.pagination import StandardResultsSetPagination
 from music_sheet.custom_permissions import CustomerPermission
 
@@ -207,6 +208,8 @@ class ProductByCategoryView(generics.ListAPIView):
 
     def get_queryset(self):
         category_id = self.request.query_params.get("category_id")
+        if self.request.query_params.get("include_descendants") == "true":
+            return self.get_descendants_queryset(category_id)
         try:
             queryset = Product.objects.filter(category=category_id)
         except Product.DoesNotExist:
@@ -215,6 +218,69 @@ class ProductByCategoryView(generics.ListAPIView):
             )
         return queryset
 
+    def get_descendants_queryset(self, category_id):
+        # Products of the category and all of its subcategories, matched with
+        # a prefix of the indexed Category.path
+        category_path = (
+            Category.objects.filter(id=category_id).values_list("path", flat=True).first()
+        )
+        if not category_path:
+            return Product.objects.none()
+        product_ids = Product.category.through.objects.filter(
+            category__path__startswith=category_path
+        ).values("product_id")
+        return Product.objects.filter(id__in=product_ids)
+
+
+class ProductShelvesView(generics.GenericAPIView):
+    # The first products of every category or section, for the storefront
+    MAX_LIMIT = 50
+
+    def get(self, request, *args, **kwargs):
+        group = request.query_params.get("group_by", "category")
+        order = request.query_params.get("order", "newest")
+        if group not in SHELF_GROUPS or order not in SHELF_ORDERS:
+            return Response(
+                {
+                    "detail": _(
+                        "group_by must be one of: {}, order one of: {}"
+                    ).format(", ".join(SHELF_GROUPS), ", ".join(SHELF_ORDERS))
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= self.MAX_LIMIT:
+            return Response(
+                {
+                    "detail": _("limit must be between 1 and {}").format(
+                        self.MAX_LIMIT
+                    )
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        shelves = product_shelves(group, order, limit)
+        return Response(
+            [
+                {
+                    **shelf,
+                    "products": [
+                        {
+                            **product,
+                            "image": request.build_absolute_uri(product["image"])
+                            if product["image"]
+                            else None,
+                        }
+                        for product in shelf["products"]
+                    ],
+                }
+                for shelf in shelves
+            ]
+        )
+
 
 class ProductRetrieveView(generics.RetrieveAPIView):
     serializer_class = ProductSerializer
@@ -4,7 +4,7 @@ from django.db import IntegrityError
 
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from music_sheet.authentication import JWTAuthentication
 
 from apps.rating.models import Rating
 from apps.rating.serializers import RatingSerializer, RatingDialogSerializer
@@ -2,15 +2,14 @@ from django.db import models
 from django.conf import settings
 from django.dispatch import receiver
 from django.db.models.signals import pre_save
-from django.core.files.base import ContentFile
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
 import uuid
 import os
-from PIL import Image
-from io import BytesIO
 
+from apps.jobs.queue import enqueue
+from music_sheet.uploads import IMAGE_MAX_BYTES, normalize_images
 from music_sheet.util import unique_slug_generator
 
 
@@ -91,45 +90,20 @@ class Section(models.Model):
     gallery = models.ManyToManyField(
         "SectionMediaFiles", related_name="sections", blank=True
     )
+    # Products that are not deleted in the section, and those of them that
+    # are active, see apps.product.counts
+    product_count = models.PositiveIntegerField(default=0, editable=False)
+    active_product_count = models.PositiveIntegerField(default=0, editable=False)
 
     def save(self, *args, **kwargs):
+        # Only an image uploaded with this save is resized, its size is read
+        # from the upload rather than from storage
+        new_image = bool(self.image) and not self.image._committed
+        oversized = new_image and self.image.size > IMAGE_MAX_BYTES
         super().save(*args, **kwargs)
-        if self.image:
-            image_size = self.image.size  # Size in bytes
-            max_size_bytes = 500 * 500  # .5 MB
-            if image_size > max_size_bytes:
-                # Resize the photo
-                self.resize_photo()
-
-    def resize_photo(self):
-        # Set the maximum size in bytes (1 MB = 1024 * 1024 bytes)
-        max_size_bytes = 500 * 500
-
-        # Open the image using Pillow
-        with Image.open(self.image.path) as img:
-            # Check the size of the image in bytes
-            img_byte_array = BytesIO()
-            img.save(img_byte_array, format=img.format)
-            img_size_bytes = img_byte_array.tell()
-
-            # If the image size exceeds the maximum size, resize it
-            if img_size_bytes > max_size_bytes:
-                # Calculate the scaling factor to resize the image
-                scaling_factor = (max_size_bytes / img_size_bytes) ** 0.5
-                new_width = int(img.width * scaling_factor)
-                new_height = int(img.height * scaling_factor)
-
-                # Resize the image
-                resized_img = img.resize((new_width, new_height))
-
-                # Save the resized image back to the photo field
-                buffer = BytesIO()
-                resized_img.save(buffer, format=img.format)
-                self.image.save(
-                    os.path.basename(self.image.name),
-                    ContentFile(buffer.getvalue()),
-                    save=True,
-                )
+        if oversized:
+            # Resized by a worker rather than while the request waits
+            enqueue(normalize_images, "section.Section", "image", [self.image.name])
 
 
 class SectionMediaFiles(models.Model):
@@ -5,6 +5,7 @@ from django.core.files.storage import default_storage
 from django.conf import settings
 
 from apps.section.models import Section, SectionMediaFiles
+from music_sheet.uploads import save_uploads
 
 
 class SectionMediaSerializer(serializers.ModelSerializer):
@@ -61,6 +62,8 @@ class SectionSerializer(serializers.ModelSerializer):
             "video",
             "gallery",
             "uploaded_media",
+            "product_count",
+            "active_product_count",
         ]
         read_only_fields = [
             "id",
@@ -82,15 +85,11 @@ class SectionSerializer(serializers.ModelSerializer):
         section = Section.objects.create(**validated_data)
 
         if uploaded_media_data:
-            media_instances = []
-            for media_file in uploaded_media_data:
-                media_instance = SectionMediaFiles.objects.create(
-                    section=section, media=media_file
+            section.gallery.add(
+                *save_uploads(
+                    SectionMediaFiles, "media", uploaded_media_data, section=section
                 )
-                media_instances.append(media_instance)
-
-            section.gallery.set(media_instances)
-            section.save()
+            )
 
         return section
 
@@ -103,18 +102,10 @@ class SectionSerializer(serializers.ModelSerializer):
         instance.save()
 
         if uploaded_media_data:
-            existing_media_instances = instance.gallery.all()
-            existing_media_instance_ids = [
-                media.media.id for media in existing_media_instances
-            ]
-            new_media_instances = [
-                SectionMediaFiles(section=instance, media=media_data)
-                for media_data in uploaded_media_data
-                if media_data.id not in existing_media_instance_ids
-            ]
-            saved_new_media_instances = [instance for instance in new_media_instances]
-            instance.gallery.set(
-                list(existing_media_instances) + saved_new_media_instances
+            instance.gallery.add(
+                *save_uploads(
+                    SectionMediaFiles, "media", uploaded_media_data, section=instance
+                )
             )
 
         return instance
@@ -156,6 +147,25 @@ class ActiveSectionSerializer(serializers.ModelSerializer):
         model=Section
         fields=['is_active']
 
+class PublicSectionSerializer(serializers.ModelSerializer):
+    # What visitors may see of a section, without who created or changed it
+    gallery = SectionMediaSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Section
+        fields = [
+            "id",
+            "name",
+            "name_ar",
+            "slug",
+            "description",
+            "image",
+            "video",
+            "gallery",
+            "active_product_count",
+        ]
+
+
 class SectionDialogSerializer(serializers.ModelSerializer):
     class Meta:
         model = Section
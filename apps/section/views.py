@@ -11,7 +11,7 @@ from rest_framework import (
     generics,
     status,
 )
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from music_sheet.authentication import JWTAuthentication
 from apps.section.models import Section, SectionMediaFiles
 from apps.section.serializers import (
     SectionSerializer,
@@ -30,18 +30,11 @@ class SectionCreateView(generics.CreateAPIView):
     permission_classes = [CustomerPermission]
 
     def perform_create(self, serializer):
-        section = serializer.save(
+        # SectionSerializer.create stores the uploaded_media
+        serializer.save(
             created_by=self.request.user,
             updated_by=self.request.user,
         )
-        media_files = self.request.FILES.getlist("uploaded_media")
-        media_instances = [
-            SectionMediaFiles.objects.create(section=section, media=media_file)
-            for media_file in media_files
-        ]
-        for media_instance in media_instances:
-            media_instance.save()
-        section.gallery.set(media_instances)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from apps.service.models import Service, ServiceImages
+from music_sheet.uploads import save_uploads
 
 
 class ServiceImageSerializer(serializers.ModelSerializer):
@@ -71,13 +72,7 @@ class ServiceSerializer(serializers.ModelSerializer):
         service = Service.objects.create(**validated_data)  # Create the service object
 
         if uploaded_images_data:
-            for image_data in uploaded_images_data:
-                service_image = ServiceImages.objects.create(
-                    service=service, image=image_data
-                )  # Set service field
-                service.gallery.add(
-                    service_image
-                )  # Associate service image with the service
+            save_uploads(ServiceImages, "image", uploaded_images_data, service=service)
 
         return service
 
@@ -96,11 +91,7 @@ class ServiceSerializer(serializers.ModelSerializer):
             # instance.gallery.all().delete()
 
             # Create new images
-            for image_data in uploaded_images_data:
-                service_image = ServiceImages.objects.create(
-                    service=instance, image=image_data
-                )
-                instance.gallery.add(service_image)
+            save_uploads(ServiceImages, "image", uploaded_images_data, service=instance)
 
         return instance
 
@@ -15,7 +15,7 @@ from rest_framework import (
     generics,
     status,
 )
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from music_sheet.authentication import JWTAuthentication
 
 from music_sheet.pagination import StandardResultsSetPagination
 from music_sheet.custom_permissions import CustomerPermission
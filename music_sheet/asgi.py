@@ -1,5 +1,5 @@
 """
-ASGI config for f_gardens project.
+ASGI config for music_sheet project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
@@ -11,6 +11,6 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'f_gardens.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'music_sheet.settings')
 
 application = get_asgi_application()
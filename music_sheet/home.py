@@ -0,0 +1,128 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Avg
+from django.utils import translation
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.about_us.models import AboutUs
+from apps.about_us.serializers import AboutUsSerializer
+from apps.category.models import Category
+from apps.category.serializers import CategorySerializer
+from apps.product.models import Product
+from apps.product.serializers import ProductImageOnlySerializer
+from apps.section.models import Section
+from apps.section.serializers import PublicSectionSerializer
+from apps.service.models import Service
+from apps.service.serializers import ServiceSerializer
+
+
+# Each block matches the first page of the list view it replaces on the home
+# page: ActiveSectionListView, ActiveCategoryListView, ProductActiveListView,
+# AboutUsListView and ActiveServiceListView. The section list is for staff
+# only, its block leaves out what only staff may see.
+
+
+def _sections(context, size):
+    sections = (
+        Section.objects.filter(is_deleted=False, is_active=True)
+        .prefetch_related("gallery")
+        .order_by("-created_at")[:size]
+    )
+    return PublicSectionSerializer(sections, many=True, context=context).data
+
+
+def _categories(context, size):
+    categories = (
+        Category.objects.filter(is_deleted=False, is_active=True)
+        .select_related("parent", "created_by", "updated_by")
+        .order_by("-created_at")[:size]
+    )
+    return CategorySerializer(categories, many=True, context=context).data
+
+
+def _products(context, size):
+    products = (
+        Product.objects.filter(is_active=True, is_deleted=False)
+        .select_related("section", "created_by", "updated_by")
+        .annotate(avg_ratings=Avg("ratings__stars"))
+        .order_by("-created_at")[:size]
+    )
+    return ProductImageOnlySerializer(products, many=True, context=context).data
+
+
+def _about_us(context, size):
+    about_us = AboutUs.objects.select_related("created_by", "updated_by").order_by(
+        "index"
+    )
+    return AboutUsSerializer(about_us.first(), context=context).data
+
+
+def _services(context, size):
+    services = (
+        Service.objects.filter(is_deleted=False, is_active=True)
+        .select_related("created_by", "updated_by")
+        .order_by("-created_at")[:size]
+    )
+    return ServiceSerializer(services, many=True, context=context).data
+
+
+HOME_BLOCKS = {
+    "sections": _sections,
+    "categories": _categories,
+    "products": _products,
+    "about_us": _about_us,
+    "services": _services,
+}
+
+
+def _build_block(name, context, language):
+    # Runs in a pool thread, which has a connection and an active language of
+    # its own
+    try:
+        with translation.override(language):
+            return HOME_BLOCKS[name](context, settings.HOME_BLOCK_SIZE)
+    finally:
+        connections.close_all()
+
+
+def home_blocks(request):
+    """
+    Return the home page blocks, each cached for its HOME_BLOCK_CACHE_TTLS
+    seconds. The blocks missing from the cache are built concurrently, so a
+    cold home page takes about as long as its slowest block.
+    """
+    language = translation.get_language()
+    # Serializers make media urls absolute for the requested host
+    keys = {
+        name: f"home:{name}:{language}:{request.scheme}://{request.get_host()}"
+        for name in HOME_BLOCKS
+    }
+    cached = cache.get_many(keys.values())
+    blocks = {name: cached[key] for name, key in keys.items() if key in cached}
+    missing = [name for name in HOME_BLOCKS if name not in blocks]
+    if not missing:
+        return blocks
+
+    context = {"request": request}
+    with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+        futures = {
+            name: pool.submit(_build_block, name, context, language)
+            for name in missing
+        }
+        for name, future in futures.items():
+            blocks[name] = future.result()
+            cache.set(keys[name], blocks[name], settings.HOME_BLOCK_CACHE_TTLS[name])
+    return {name: blocks[name] for name in HOME_BLOCKS}
+
+
+class HomeView(APIView):
+    # Public like the list views it replaces, nothing to authenticate
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        return Response(home_blocks(request))
@@ -1,4 +1,4 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 from django.utils.translation import gettext_lazy as _
 
@@ -30,3 +30,11 @@ class StandardResultsSetPagination(PageNumberPagination):
                 "results": data,
             }
         )
+
+
+class NewestFirstCursorPagination(CursorPagination):
+    # Keyset pagination, page cost does not grow with how far the client pages
+    page_size = 5
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    ordering = "-created_at"
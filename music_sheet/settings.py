@@ -50,11 +50,22 @@ INSTALLED_APPS = [
     "apps.cart",
     "apps.rating",
     "apps.order",
+    "apps.analytics",
+    "apps.outbox",
+    "apps.jobs",
 
 ]
 
 # email settings for mailhog
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Emails are queued in the outbox and delivered by the send_outbox_emails
+# command through OUTBOX_DELIVERY_BACKEND
+EMAIL_BACKEND = "apps.outbox.backends.OutboxEmailBackend"
+OUTBOX_DELIVERY_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+OUTBOX_BATCH_SIZE = env.int("OUTBOX_BATCH_SIZE", default=100)
+OUTBOX_MAX_ATTEMPTS = env.int("OUTBOX_MAX_ATTEMPTS", default=5)
+# Seconds before the first retry, doubled for every further one
+OUTBOX_RETRY_DELAY = env.int("OUTBOX_RETRY_DELAY", default=60)
+EMAIL_TIMEOUT = env.int("EMAIL_TIMEOUT", default=30)
 EMAIL_HOST = "127.0.0.1"
 EMAIL_PORT = 1025
 EMAIL_HOST_USER = ""
@@ -121,9 +132,70 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.BasicAuthentication",
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "music_sheet.authentication.JWTAuthentication",
     ),
 }
+# Share the cache between workers (e.g. rediscache://...) so invalidation
+# reaches all of them, the per-process default only suits a single worker
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
+AUTHENTICATION_BACKENDS = ["user.backends.CachedPermissionBackend"]
+
+# Seconds an authenticated user stays cached between requests
+JWT_USER_CACHE_TTL = env.int("JWT_USER_CACHE_TTL", default=60)
+# Seconds a user's groups and permissions stay cached, changes bust it earlier
+PERMISSION_CACHE_TTL = env.int("PERMISSION_CACHE_TTL", default=3600)
+# Seconds a "value does not exist" answer of check_field_value_existence is
+# reused, long enough to cover typing pauses in admin forms
+FIELD_EXISTENCE_CACHE_TTL = env.int("FIELD_EXISTENCE_CACHE_TTL", default=10)
+# Seconds the category tree stays cached, category changes replace it earlier
+CATEGORY_TREE_CACHE_TTL = env.int("CATEGORY_TREE_CACHE_TTL", default=3600)
+# Seconds product shelves stay cached, product changes replace them earlier
+# but new ratings and views only show up once this runs out
+PRODUCT_SHELVES_CACHE_TTL = env.int("PRODUCT_SHELVES_CACHE_TTL", default=300)
+# Items in each list block of the home page, the list views' page size
+HOME_BLOCK_SIZE = env.int("HOME_BLOCK_SIZE", default=5)
+# Seconds each block of the home page stays cached
+HOME_BLOCK_CACHE_TTLS = {
+    "sections": env.int("HOME_SECTIONS_CACHE_TTL", default=600),
+    "categories": env.int("HOME_CATEGORIES_CACHE_TTL", default=600),
+    "products": env.int("HOME_PRODUCTS_CACHE_TTL", default=60),
+    "about_us": env.int("HOME_ABOUT_US_CACHE_TTL", default=3600),
+    "services": env.int("HOME_SERVICES_CACHE_TTL", default=3600),
+}
+# Seconds before each worker pulls new token revocations, and before it
+# rebuilds its Bloom filter to forget pruned ones
+TOKEN_REVOCATION_SYNC_INTERVAL = env.float("TOKEN_REVOCATION_SYNC_INTERVAL", default=5)
+TOKEN_REVOCATION_REBUILD_INTERVAL = env.int(
+    "TOKEN_REVOCATION_REBUILD_INTERVAL", default=3600
+)
+# 2**20 bits (128 KB) with 7 hashes keeps false positives under 1% up to
+# about 100k revocations
+TOKEN_REVOCATION_BLOOM_BITS = env.int("TOKEN_REVOCATION_BLOOM_BITS", default=2**20)
+TOKEN_REVOCATION_BLOOM_HASHES = env.int("TOKEN_REVOCATION_BLOOM_HASHES", default=7)
+
+# Background jobs, run by the run_jobs command
+JOB_WORKERS = env.int("JOB_WORKERS", default=4)
+JOB_POLL_INTERVAL = env.float("JOB_POLL_INTERVAL", default=1)
+JOB_MAX_ATTEMPTS = env.int("JOB_MAX_ATTEMPTS", default=3)
+# Seconds before the first retry, doubled for every further one
+JOB_RETRY_DELAY = env.int("JOB_RETRY_DELAY", default=30)
+# Seconds after which a running job is considered abandoned by its worker
+JOB_STALE_AFTER = env.int("JOB_STALE_AFTER", default=600)
+# Uploaded files of one request written to storage at the same time
+UPLOAD_WORKERS = env.int("UPLOAD_WORKERS", default=8)
+
+# Rendered thumbnails, least recently used ones are deleted once the
+# directory outgrows THUMBNAIL_CACHE_MAX_BYTES
+THUMBNAIL_CACHE_DIR = env.str(
+    "THUMBNAIL_CACHE_DIR", default=os.path.join(BASE_DIR, "cache", "thumbnails")
+)
+THUMBNAIL_CACHE_MAX_BYTES = env.int("THUMBNAIL_CACHE_MAX_BYTES", default=512 * 2**20)
+# Seconds between two size checks of the thumbnail cache in a process
+THUMBNAIL_EVICT_INTERVAL = env.int("THUMBNAIL_EVICT_INTERVAL", default=60)
+# Largest width or height a thumbnail can be asked for
+THUMBNAIL_MAX_SIZE = env.int("THUMBNAIL_MAX_SIZE", default=1024)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=43500),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -191,13 +263,39 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "music_sheet.wsgi.application"
+ASGI_APPLICATION = "music_sheet.asgi.application"
 
 
 #payPal Settings
 PAYPAL_CLIENT_ID = env("PAYPAL_CLIENT_ID")
 PAYPAL_CLIENT_SECRET = env("PAYPAL_CLIENT_SECRET")
-PAYPAL_MODE = 'sandbox'  # or 'live' for production
-PAYPAL_BASE_URL=env('PAYPAL_BASE_URL')
+PAYPAL_MODE = env("PAYPAL_MODE", default="sandbox")  # or 'live' for production
+PAYPAL_BASE_URLS = {
+    "sandbox": "https://api-m.sandbox.paypal.com",
+    "live": "https://api-m.paypal.com",
+}
+# Only needs to be set to reach PayPal through some other host
+PAYPAL_BASE_URL = env("PAYPAL_BASE_URL", default=PAYPAL_BASE_URLS[PAYPAL_MODE])
+PAYPAL_RETURN_URL = env(
+    "PAYPAL_RETURN_URL", default="https://music-score-pi.vercel.app/execute-payment/"
+)
+PAYPAL_CANCEL_URL = env(
+    "PAYPAL_CANCEL_URL", default="https://music-score-pi.vercel.app/cancel-payment/"
+)
+# Seconds before a PayPal call is abandoned, and how often it is retried
+PAYPAL_TIMEOUT = env.float("PAYPAL_TIMEOUT", default=10.0)
+PAYPAL_MAX_RETRIES = env.int("PAYPAL_MAX_RETRIES", default=2)
+PAYPAL_MAX_CONNECTIONS = env.int("PAYPAL_MAX_CONNECTIONS", default=20)
+
+# Use "apps.order.gateways.StubGateway" to run checkout without PayPal
+PAYMENT_GATEWAY = env("PAYMENT_GATEWAY", default="apps.order.gateways.PayPalGateway")
+STUB_GATEWAY_LATENCY = env.float("STUB_GATEWAY_LATENCY", default=0.2)
+
+# Order numbers reserved per worker in one round trip (1 keeps them gap-free)
+# On PostgreSQL it is the increment migrate gives the order number sequence
+ORDER_NUMBER_BLOCK_SIZE = env.int("ORDER_NUMBER_BLOCK_SIZE", default=1)
+# Seconds a duplicate payment execution waits for the first one to finish
+PAYMENT_EXECUTION_WAIT_TIMEOUT = env.int("PAYMENT_EXECUTION_WAIT_TIMEOUT", default=30)
 
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
@@ -267,6 +365,11 @@ STATIC_URL = "/static/"
 MEDIA_URL = "/media/"
 
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# Uploads are stored once per distinct content, media files are hard links to
+# the blobs. MEDIA_BLOB_ROOT is kept inside MEDIA_ROOT so both are on the same
+# file system, the web server must not serve it.
+DEFAULT_FILE_STORAGE = "music_sheet.storage.DeduplicatingStorage"
+MEDIA_BLOB_ROOT = env.str("MEDIA_BLOB_ROOT", default=os.path.join(MEDIA_ROOT, ".blobs"))
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
 
 # Default primary key field type
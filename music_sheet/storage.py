@@ -0,0 +1,147 @@
+import hashlib
+import os
+import time
+import uuid
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.functional import cached_property
+
+
+class DeduplicatingStorage(FileSystemStorage):
+    """
+    File system storage that keeps every distinct content once. Uploads are
+    hashed with SHA-256 while they are written and stored as a blob named
+    after the hash in MEDIA_BLOB_ROOT. The name the model asked for becomes a
+    hard link to the blob, so stored names, urls and paths stay as they were.
+
+    The link count of a blob is its reference count, deleting the last name
+    linked to a blob deletes the blob too. Where files can not be linked,
+    e.g. across file systems, uploads are stored as plain copies.
+    """
+
+    CHUNK_SIZE = 64 * 2**10
+    # Temporary files of uploads interrupted by a crash are deleted after this
+    # many seconds, the blob root is checked at most once per interval
+    STALE_TMP_AGE = 3600
+    SWEEP_INTERVAL = 600
+
+    _last_sweep = 0
+
+    def __init__(self, blob_root=None, **kwargs):
+        super().__init__(**kwargs)
+        self._blob_root = blob_root
+
+    @cached_property
+    def blob_root(self):
+        return os.path.abspath(self._blob_root or settings.MEDIA_BLOB_ROOT)
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_root, digest[:2], digest)
+
+    def _write_blob(self, content):
+        # Writes content aside while hashing it, returns the temporary file
+        # and the path of the blob it belongs at
+        os.makedirs(self.blob_root, exist_ok=True)
+        self._sweep_temporary_files()
+        tmp_path = os.path.join(self.blob_root, f".{uuid.uuid4().hex}")
+        # Created like FileSystemStorage creates files, honouring the umask
+        fd = os.open(
+            tmp_path,
+            os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0),
+            0o666,
+        )
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        blob_path = self.blob_path(digest.hexdigest())
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        return tmp_path, blob_path
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        tmp_path, blob_path = self._write_blob(content)
+        try:
+            while True:
+                try:
+                    os.link(tmp_path, blob_path)
+                except FileExistsError:
+                    # Stored already, the upload is dropped
+                    pass
+                try:
+                    os.link(blob_path, full_path)
+                except FileExistsError:
+                    # Another file took the name meanwhile, like in
+                    # FileSystemStorage._save
+                    name = self.get_available_name(name)
+                    full_path = self.path(name)
+                except FileNotFoundError:
+                    # The blob lost its last name meanwhile, store it again
+                    continue
+                else:
+                    break
+        except OSError:
+            # No hard links here, e.g. the name is on another file system
+            with open(tmp_path, "rb") as tmp:
+                name = super()._save(name, File(tmp))
+        finally:
+            os.unlink(tmp_path)
+        return str(name).replace("\\", "/")
+
+    def delete(self, name):
+        if not name:
+            raise ValueError("The name must be given to delete().")
+        path = self.path(name)
+        blob_path = None
+        try:
+            if os.path.isfile(path) and os.stat(path).st_nlink == 2:
+                # Likely the last name of a blob, which is found by its hash
+                digest = hashlib.sha256()
+                with open(path, "rb") as file:
+                    for chunk in iter(lambda: file.read(self.CHUNK_SIZE), b""):
+                        digest.update(chunk)
+                blob_path = self.blob_path(digest.hexdigest())
+        except FileNotFoundError:
+            pass
+        super().delete(name)
+        if blob_path:
+            self._collect(blob_path)
+
+    def _collect(self, blob_path):
+        # A save linking the blob right after the check only loses sharing,
+        # its name keeps the content alive
+        try:
+            if os.stat(blob_path).st_nlink == 1:
+                os.unlink(blob_path)
+        except FileNotFoundError:
+            pass
+
+    def _sweep_temporary_files(self):
+        now = time.monotonic()
+        if now - DeduplicatingStorage._last_sweep < self.SWEEP_INTERVAL:
+            return
+        DeduplicatingStorage._last_sweep = now
+        stale_before = time.time() - self.STALE_TMP_AGE
+        with os.scandir(self.blob_root) as entries:
+            for entry in entries:
+                try:
+                    if (
+                        entry.name.startswith(".")
+                        and entry.is_file()
+                        and entry.stat().st_mtime < stale_before
+                    ):
+                        os.unlink(entry.path)
+                except FileNotFoundError:
+                    continue
@@ -0,0 +1,221 @@
+import fcntl
+import hashlib
+import os
+import posixpath
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, JsonResponse
+from django.utils.translation import gettext_lazy as _
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework.views import APIView
+
+
+# Only pictures can be thumbnailed, never e.g. the paid product files
+THUMBNAIL_SOURCE_DIRS = (
+    "uploads/product/images/",
+    "uploads/category/",
+    "uploads/section/",
+    "uploads/service/",
+    "uploads/employee/",
+)
+THUMBNAIL_SOURCE_EXTENSIONS = (
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".gif",
+    ".bmp",
+    ".tiff",
+    ".webp",
+)
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "png": ("PNG", "image/png"),
+}
+# Stored names are never rewritten in place (uploads get a fresh uuid name,
+# resizing saves a new file), so a thumbnail url always shows the same image
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# A hit refreshes the thumbnail's place in the LRU order at most this often
+TOUCH_INTERVAL = 3600
+# The cache is shrunk to this share of THUMBNAIL_CACHE_MAX_BYTES when full
+EVICT_TO = 0.9
+
+_last_eviction = 0
+
+
+@contextmanager
+def _file_lock(path, blocking=True):
+    # flock works across processes and threads, yields whether it was acquired
+    with open(path, "a") as lock_file:
+        try:
+            fcntl.flock(
+                lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            )
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _render(name, width, height, image_format, destination):
+    with default_storage.open(name) as source, Image.open(source) as img:
+        # JPEGs are decoded at a reduced scale right away, Image.thumbnail
+        # then shrinks with reduce() before the final resampling
+        img.draft("RGB", (width, height))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((width, height), Image.LANCZOS, reducing_gap=2.0)
+        if image_format == "JPEG" and img.mode != "RGB":
+            img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA", "L", "LA"):
+            img = img.convert("RGBA")
+
+        # Written aside and moved into place, readers never see half a file
+        fd, tmp_path = tempfile.mkstemp(prefix=".", dir=os.path.dirname(destination))
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                img.save(tmp, format=image_format)
+            os.replace(tmp_path, destination)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def evict_thumbnails(force=False):
+    """
+    Delete the least recently used thumbnails until the cache fits in
+    EVICT_TO of THUMBNAIL_CACHE_MAX_BYTES. Runs at most once every
+    THUMBNAIL_EVICT_INTERVAL seconds per process, and in one process at a time.
+    """
+    global _last_eviction
+    now = time.monotonic()
+    if not force and now - _last_eviction < settings.THUMBNAIL_EVICT_INTERVAL:
+        return 0
+    _last_eviction = now
+
+    root = settings.THUMBNAIL_CACHE_DIR
+    os.makedirs(root, exist_ok=True)
+    with _file_lock(os.path.join(root, ".evict.lock"), blocking=False) as acquired:
+        if not acquired:
+            return 0
+        entries = []
+        total = 0
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                # Locks and renders in progress start with a dot
+                if filename.startswith("."):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        if total <= settings.THUMBNAIL_CACHE_MAX_BYTES:
+            return 0
+
+        evicted = 0
+        target = settings.THUMBNAIL_CACHE_MAX_BYTES * EVICT_TO
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            evicted += 1
+        return evicted
+
+
+def thumbnail_path(name, width, height, fmt):
+    """
+    Return the path of the cached width x height thumbnail of the stored
+    image name, rendering it on a miss. Concurrent misses of the same
+    thumbnail render it once, the others wait for it.
+    """
+    key = hashlib.sha256(f"{name}:{width}x{height}".encode()).hexdigest()
+    directory = os.path.join(settings.THUMBNAIL_CACHE_DIR, key[:2])
+    path = os.path.join(directory, f"{key}.{fmt}")
+    try:
+        # Hits only cost a stat, the mtime is the LRU order
+        if time.time() - os.stat(path).st_mtime > TOUCH_INTERVAL:
+            os.utime(path)
+        return path
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(directory, exist_ok=True)
+    # One lock per cache subdirectory, i.e. 256 stripes, so lock files do
+    # not pile up next to every thumbnail
+    with _file_lock(os.path.join(directory, ".lock")):
+        if not os.path.exists(path):
+            _render(name, width, height, THUMBNAIL_FORMATS[fmt][0], path)
+    evict_thumbnails()
+    return path
+
+
+def _dimension(value):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if 1 <= value <= settings.THUMBNAIL_MAX_SIZE else None
+
+
+class ThumbnailView(APIView):
+    # Public like the media files themselves
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        # A stored name, or the media url of one
+        name = posixpath.normpath(request.GET.get("path", "")).lstrip("/")
+        media_prefix = settings.MEDIA_URL.strip("/") + "/"
+        if name.startswith(media_prefix):
+            name = name[len(media_prefix) :]
+        width = _dimension(request.GET.get("w"))
+        height = _dimension(request.GET.get("h", request.GET.get("w")))
+        fmt = request.GET.get("fmt", "webp")
+
+        if (
+            not name.startswith(THUMBNAIL_SOURCE_DIRS)
+            or not name.lower().endswith(THUMBNAIL_SOURCE_EXTENSIONS)
+            or width is None
+            or height is None
+            or fmt not in THUMBNAIL_FORMATS
+        ):
+            return JsonResponse(
+                {
+                    "detail": _(
+                        "path must be a stored image, w and h between 1 and {}, "
+                        "fmt one of: {}"
+                    ).format(
+                        settings.THUMBNAIL_MAX_SIZE, ", ".join(THUMBNAIL_FORMATS)
+                    )
+                },
+                status=400,
+            )
+        if not default_storage.exists(name):
+            return JsonResponse({"detail": _("Image not found")}, status=404)
+
+        try:
+            path = thumbnail_path(name, width, height, fmt)
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+            # Decompression bombs are pictures too large to be decoded safely
+            return JsonResponse(
+                {"detail": _("The file is not a readable image")}, status=400
+            )
+
+        content_type = THUMBNAIL_FORMATS[fmt][1]
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+        response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        response["ETag"] = f'"{os.path.basename(path)}"'
+        return response
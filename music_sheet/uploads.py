@@ -0,0 +1,101 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, UnidentifiedImageError
+
+from apps.jobs.queue import enqueue
+
+
+logger = logging.getLogger(__name__)
+
+# Same limit the models' resize_photo applies to their own image
+IMAGE_MAX_BYTES = 500 * 500
+
+
+def save_uploads(model, field_name, files, **fields):
+    """
+    Store the uploaded files concurrently and insert one model row per file,
+    with fields set on all of them, in a single bulk_create. Returns the rows.
+
+    Images are resized by a background job afterwards, see normalize_images.
+    """
+    files = list(files)
+    if not files:
+        return []
+    field = model._meta.get_field(field_name)
+    objs = [model(**fields) for _ in files]
+    names = [field.generate_filename(obj, file.name) for obj, file in zip(objs, files)]
+
+    def store(name, file):
+        return field.storage.save(name, file, max_length=field.max_length)
+
+    with ThreadPoolExecutor(
+        max_workers=min(len(files), settings.UPLOAD_WORKERS)
+    ) as pool:
+        names = list(pool.map(store, names, files))
+    for obj, name in zip(objs, names):
+        setattr(obj, field.attname, name)
+
+    try:
+        objs = model.objects.bulk_create(objs)
+    except Exception:
+        for name in names:
+            field.storage.delete(name)
+        raise
+    if any(obj.pk is None for obj in objs):
+        # Backends that do not return the ids of inserted rows
+        objs = list(model.objects.filter(**{f"{field_name}__in": names}))
+
+    images = [
+        name
+        for name, file in zip(names, files)
+        if (getattr(file, "content_type", None) or "").startswith("image/")
+    ]
+    if images:
+        enqueue(normalize_images, model._meta.label, field_name, images)
+    return objs
+
+
+def _resized(content):
+    # The resize_photo algorithm: scale both sides by the same factor until
+    # the encoded image is about IMAGE_MAX_BYTES
+    with Image.open(BytesIO(content)) as img:
+        scaling_factor = (IMAGE_MAX_BYTES / len(content)) ** 0.5
+        resized_img = img.resize(
+            (int(img.width * scaling_factor), int(img.height * scaling_factor))
+        )
+        buffer = BytesIO()
+        resized_img.save(buffer, format=img.format)
+        return buffer.getvalue()
+
+
+def normalize_images(model_label, field_name, names):
+    """
+    Background job: shrink the stored images of model_label.field_name over
+    IMAGE_MAX_BYTES and point their rows at the resized files.
+    """
+    model = apps.get_model(model_label)
+    field = model._meta.get_field(field_name)
+    for name in names:
+        if not field.storage.exists(name) or field.storage.size(name) <= IMAGE_MAX_BYTES:
+            continue
+        with field.storage.open(name) as file:
+            content = file.read()
+        try:
+            resized = _resized(content)
+        except (UnidentifiedImageError, OSError) as error:
+            logger.warning(f"Could not resize {name}: {error}")
+            continue
+        # Saved next to the original, the storage picks a free name
+        new_name = field.storage.save(
+            name, ContentFile(resized), max_length=field.max_length
+        )
+        if model.objects.filter(**{field_name: name}).update(**{field_name: new_name}):
+            field.storage.delete(name)
+        else:
+            # The row went away or changed its file meanwhile
+            field.storage.delete(new_name)
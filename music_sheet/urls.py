@@ -1,8 +1,11 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.http import Http404
+from django.urls import path, include, re_path
 from django.conf.urls.static import static
 from django.conf import settings
 from django.conf.urls.i18n import i18n_patterns
+from music_sheet.home import HomeView
+from music_sheet.thumbnails import ThumbnailView
 from music_sheet.util import CheckFieldValueExistenceView
 
 urlpatterns = [
@@ -19,6 +22,8 @@ urlpatterns += i18n_patterns(
         CheckFieldValueExistenceView.as_view(),
         name="check_field_value_existence",
     ),
+    path("api/home/", HomeView.as_view(), name="home"),
+    path("api/thumbnail/", ThumbnailView.as_view(), name="thumbnail"),
     path("api/users/", include("user.urls")),
     path("api/permissions/", include("apps.permissions_api.urls")),
     path("api/service/", include("apps.service.urls")),
@@ -31,9 +36,21 @@ urlpatterns += i18n_patterns(
     path("api/cart/", include("apps.cart.urls")),
     path("api/rating/", include("apps.rating.urls")),
     path("api/order/", include("apps.order.urls")),
+    path("api/analytics/", include("apps.analytics.urls")),
 )
 
+
+def blob_not_found(request, *args, **kwargs):
+    # Stored uploads are only reachable through the names linked to them
+    raise Http404
+
+
 if settings.DEBUG:
+    urlpatterns += [
+        re_path(
+            r"^{}/\.blobs/".format(settings.MEDIA_URL.strip("/")), blob_not_found
+        ),
+    ]
     urlpatterns += static(
         settings.MEDIA_URL,
         document_root=settings.MEDIA_ROOT,
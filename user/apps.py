@@ -10,3 +10,4 @@ class UserConfig(AppConfig):
         from music_sheet.util import create_initial_groups  # Import your signals module
 
         post_migrate.connect(create_initial_groups, sender=self)
+        import user.signals
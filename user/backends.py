@@ -0,0 +1,17 @@
+from django.contrib.auth.backends import ModelBackend
+
+from user.permission_cache import get_all_permission_names, get_cached_permissions
+
+
+class CachedPermissionBackend(ModelBackend):
+    """
+    ModelBackend that answers permission checks from the permission cache
+    instead of querying groups and permissions for every user.
+    """
+
+    def _get_permissions(self, user_obj, obj, from_name):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if user_obj.is_superuser:
+            return set(get_all_permission_names())
+        return set(get_cached_permissions(user_obj)[f"{from_name}_permissions"])
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from user.revocation import prune_token_revocations
+
+
+class Command(BaseCommand):
+    help = "Delete token revocations that only cover expired tokens."
+
+    def handle(self, *args, **options):
+        deleted = prune_token_revocations()
+        self.stdout.write(
+            self.style.SUCCESS(f"Pruned {deleted} expired token revocations.")
+        )
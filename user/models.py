@@ -9,9 +9,10 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import Group, Permission
 
+import hashlib
 import uuid
 import os
-from PIL import Image
+from PIL import Image, ImageOps
 from io import BytesIO
 
 
@@ -36,6 +37,41 @@ def user_photo_file_path(instance, filename):
     return os.path.join("uploads", "employee", filename)
 
 
+# Photos shared by many users, they are never processed per user
+DEFAULT_PHOTO_DIR = "default_photos/"
+PHOTO_MAX_BYTES = 1024 * 1024  # 1 MB
+AVATAR_SIZE = (300, 300)
+
+
+def _encode(img, img_format):
+    buffer = BytesIO()
+    img.save(buffer, format=img_format)
+    return buffer.getvalue()
+
+
+def photo_and_avatar(content):
+    """
+    Decode a photo once and return it shrunk to about PHOTO_MAX_BYTES (None
+    when it is small enough already) and its AVATAR_SIZE avatar as PNG,
+    cropped to keep the aspect ratio rather than stretched.
+    """
+    with Image.open(BytesIO(content)) as img:
+        img_format = img.format
+        # The byte size of the upload, nothing is re-encoded to measure it
+        scaling_factor = min(1, (PHOTO_MAX_BYTES / len(content)) ** 0.5)
+        new_size = (int(img.width * scaling_factor), int(img.height * scaling_factor))
+        # JPEGs are decoded right at the smallest scale both outputs need
+        img.draft(
+            "RGB", (max(new_size[0], AVATAR_SIZE[0]), max(new_size[1], AVATAR_SIZE[1]))
+        )
+
+        photo = None
+        if scaling_factor < 1:
+            photo = _encode(img.resize(new_size), img_format)
+        avatar = ImageOps.fit(ImageOps.exif_transpose(img), AVATAR_SIZE, Image.LANCZOS)
+        return photo, _encode(avatar, "PNG")
+
+
 class UserManager(BaseUserManager):
     def create_user(
         self, email=None, mobile_number=None, password=None, **extra_fields
@@ -138,75 +174,78 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=True)
     is_deleted = models.BooleanField(default=False)
+    # sha256 of the photo the current photo and avatar files were made from
+    photo_hash = models.CharField(max_length=64, blank=True, default="", editable=False)
 
     objects = UserManager()
 
     USERNAME_FIELD = "email"
 
     def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "photo" in update_fields:
+            if self._prepare_photo() and update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    "photo",
+                    "avatar",
+                    "photo_hash",
+                }
         super().save(*args, **kwargs)
-        # Check if the photo exists and its size exceeds the maximum allowed size
-        if self.photo:
-            photo_size = self.photo.size  # Size in bytes
-            max_size_bytes = 1024 * 1024  # 1 MB
-
-            if photo_size > max_size_bytes:
-                # Resize the photo
-                self.resize_photo()
-
-            # Resize and save the avatar image
-            if not self.avatar:
-                self.resize_and_save_avatar()
-
-    def resize_photo(self):
-        # Set the maximum size in bytes (1 MB = 1024 * 1024 bytes)
-        max_size_bytes = 1024 * 1024
-
-        # Open the image using Pillow
-        with Image.open(self.photo.path) as img:
-            # Check the size of the image in bytes
-            img_byte_array = BytesIO()
-            img.save(img_byte_array, format=img.format)
-            img_size_bytes = img_byte_array.tell()
-
-            # If the image size exceeds the maximum size, resize it
-            if img_size_bytes > max_size_bytes:
-                # Calculate the scaling factor to resize the image
-                scaling_factor = (max_size_bytes / img_size_bytes) ** 0.5
-                new_width = int(img.width * scaling_factor)
-                new_height = int(img.height * scaling_factor)
-
-                # Resize the image
-                resized_img = img.resize((new_width, new_height))
-
-                # Save the resized image back to the photo field
-                buffer = BytesIO()
-                resized_img.save(buffer, format=img.format)
-                self.photo.save(
-                    os.path.basename(self.photo.name),
-                    ContentFile(buffer.getvalue()),
-                    save=True,
-                )
-
-    def resize_and_save_avatar(self):
-        # Check if the photo field is not empty
-        if self.photo:
-            photo_path = self.photo.path
-
-            # Check if the avatar field is not already set
-            # if not self.avatar:
-            # Open the image using Pillow
-        with Image.open(photo_path) as img:
-            # Resize the image (adjust the size as needed)
-            resized_img = img.resize((300, 300))
-
-            # Save the resized image as the avatar
-            buffer = BytesIO()
-            resized_img.save(buffer, format="PNG")
-            self.avatar.save("avatar.png", ContentFile(buffer.getvalue()), save=True)
+
+    def _prepare_photo(self):
+        # Shrinks a new photo and makes its avatar before the row is written,
+        # so the user is saved once. Returns whether any photo field changed.
+        name = self.photo.name if self.photo else None
+        if not name:
+            return False
+        if name.startswith(DEFAULT_PHOTO_DIR):
+            # The shared default serves as its own avatar
+            if self.avatar.name == name and not self.photo_hash:
+                return False
+            self.avatar = name
+            self.photo_hash = ""
+            return True
+        if self.photo._committed and self.photo_hash:
+            # Stored and processed already, uploads are not committed yet
+            return False
+
+        self.photo.open("rb")
+        content = self.photo.read()
+        if self.photo._committed:
+            self.photo.close()
+        photo_hash = hashlib.sha256(content).hexdigest()
+        if not self.photo._committed and photo_hash == self.photo_hash:
+            # The same picture again, keep the files already made from it
+            stored = (
+                User.objects.filter(pk=self.pk).values_list("photo", flat=True).first()
+            )
+            if stored:
+                self.photo = stored
+                return True
+
+        photo, avatar = photo_and_avatar(content)
+        if photo is not None:
+            self.photo = ContentFile(photo, name=os.path.basename(name))
+        elif not self.photo._committed:
+            self.photo.seek(0)
+        self.avatar = ContentFile(avatar, name="avatar.png")
+        self.photo_hash = photo_hash
+        return True
 
     class Meta:
         def __str__(self):
             return self.email
 
 
+class TokenRevocation(models.Model):
+    # One row per revoked token ("jti:<jti>") or per user whose tokens were
+    # all revoked at once ("user:<id>"), see user.revocation
+    key = models.CharField(max_length=255, unique=True)
+    revoked_before = models.DateTimeField(blank=True, null=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return self.key
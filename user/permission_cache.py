@@ -0,0 +1,94 @@
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+
+
+# Permission data is cached under keys that embed a global version and a
+# per-user version. Bumping a version makes every entry built with the old
+# one unreachable, so nothing ever has to be deleted:
+#   - the global version changes with groups and their permissions
+#   - a user's version changes with that user's groups and permissions
+GLOBAL_VERSION_KEY = "perm_cache:version"
+
+
+def user_version_key(user_id):
+    return f"perm_cache:version:{user_id}"
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def _get_versions(*keys):
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Never fall back to a default, an evicted version must not
+            # make old entries reachable again
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_global_permission_version():
+    cache.set(GLOBAL_VERSION_KEY, _new_version(), None)
+
+
+def bump_user_permission_version(*user_ids):
+    cache.set_many({user_version_key(user_id): _new_version() for user_id in user_ids}, None)
+
+
+def _permission_names(permissions):
+    return {
+        f"{app_label}.{codename}"
+        for app_label, codename in permissions.values_list(
+            "content_type__app_label", "codename"
+        ).order_by()
+    }
+
+
+def get_cached_permissions(user):
+    """
+    Return the groups and permissions of a user as a dict with "groups"
+    (group names), "user_permissions" and "group_permissions" (sets of
+    "app_label.codename").
+
+    Served from the cache when possible and memoized on the user object for
+    the rest of the request, so repeated checks cost no queries.
+    """
+    data = getattr(user, "_cached_permissions", None)
+    if data is not None:
+        return data
+
+    global_version, user_version = _get_versions(
+        GLOBAL_VERSION_KEY, user_version_key(user.pk)
+    )
+    key = f"perm_cache:{user.pk}:{global_version}:{user_version}"
+    data = cache.get(key)
+    if data is None:
+        data = {
+            "groups": list(user.groups.values_list("name", flat=True)),
+            "user_permissions": _permission_names(
+                Permission.objects.filter(user=user)
+            ),
+            "group_permissions": _permission_names(
+                Permission.objects.filter(group__user=user)
+            ),
+        }
+        cache.set(key, data, settings.PERMISSION_CACHE_TTL)
+
+    user._cached_permissions = data
+    return data
+
+
+def get_all_permission_names():
+    # Everything a superuser has, cached until permissions or groups change
+    (global_version,) = _get_versions(GLOBAL_VERSION_KEY)
+    key = f"perm_cache:all:{global_version}"
+    names = cache.get(key)
+    if names is None:
+        names = _permission_names(Permission.objects.all())
+        cache.set(key, names, settings.PERMISSION_CACHE_TTL)
+    return names
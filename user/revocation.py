@@ -0,0 +1,231 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from rest_framework_simplejwt.settings import api_settings
+
+from user.models import TokenRevocation
+
+
+# Rows committed while a sync was reading may carry an older updated_at than
+# the sync itself, so every incremental sync looks back this far
+SYNC_LOOKBACK = timedelta(minutes=1)
+# Bound on the confirmed lookups kept per process
+MAX_CONFIRMED = 10000
+# Marks a Bloom filter positive that has no row behind it
+NOT_REVOKED = object()
+
+
+def jti_key(jti):
+    return f"jti:{jti}"
+
+
+def user_key(user_id):
+    return f"user:{user_id}"
+
+
+class BloomFilter:
+    """
+    Fixed size set of strings that may answer "present" for a key that was
+    never added, but never "absent" for one that was.
+    """
+
+    def __init__(self, size, hashes):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray((size + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing, the k positions are derived from one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class RevocationList:
+    """
+    Per-process view of the TokenRevocation table.
+
+    Keys live in a Bloom filter, so checking a token costs a few hashes and
+    no query. Only positives are confirmed against the table, and the answer
+    is kept until a later sync brings a newer row. New rows are pulled in
+    every TOKEN_REVOCATION_SYNC_INTERVAL seconds, and the filter is rebuilt
+    every TOKEN_REVOCATION_REBUILD_INTERVAL seconds to forget pruned rows.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._confirmed = {}
+        self._synced_at = 0
+        self._rebuilt_at = 0
+        self._watermark = None
+
+    def _is_fresh(self):
+        return (
+            self._filter is not None
+            and time.monotonic() - self._synced_at
+            < settings.TOKEN_REVOCATION_SYNC_INTERVAL
+        )
+
+    def sync(self, force=False):
+        if not force and self._is_fresh():
+            return self._filter
+
+        with self._lock:
+            if not force and self._is_fresh():
+                return self._filter
+
+            now = time.monotonic()
+            started_at = timezone.now()
+            rows = TokenRevocation.objects.filter(expires_at__gt=started_at)
+            rebuild = (
+                force
+                or self._filter is None
+                or now - self._rebuilt_at >= settings.TOKEN_REVOCATION_REBUILD_INTERVAL
+            )
+            if rebuild:
+                bloom = BloomFilter(
+                    settings.TOKEN_REVOCATION_BLOOM_BITS,
+                    settings.TOKEN_REVOCATION_BLOOM_HASHES,
+                )
+                confirmed = {}
+            else:
+                bloom = self._filter
+                confirmed = self._confirmed
+                rows = rows.filter(updated_at__gte=self._watermark)
+
+            for key, revoked_before in rows.values_list("key", "revoked_before").iterator():
+                bloom.add(key)
+                if key in confirmed:
+                    confirmed[key] = revoked_before
+
+            self._filter = bloom
+            self._confirmed = confirmed
+            self._watermark = started_at - SYNC_LOOKBACK
+            self._synced_at = now
+            if rebuild:
+                self._rebuilt_at = now
+            return bloom
+
+    def add(self, rows):
+        # Makes revocations visible to this process right away
+        bloom = self.sync()
+        for key, revoked_before in rows.items():
+            bloom.add(key)
+            if key in self._confirmed:
+                self._confirmed[key] = revoked_before
+
+    def _confirm(self, keys):
+        missing = [key for key in keys if key not in self._confirmed]
+        if missing:
+            if len(self._confirmed) >= MAX_CONFIRMED:
+                self._confirmed = {}
+            found = dict(
+                TokenRevocation.objects.filter(key__in=missing).values_list(
+                    "key", "revoked_before"
+                )
+            )
+            for key in missing:
+                self._confirmed[key] = found.get(key, NOT_REVOKED)
+        return {key: self._confirmed.get(key, NOT_REVOKED) for key in keys}
+
+    def is_revoked(self, token):
+        bloom = self.sync()
+        keys = [
+            key
+            for key in (
+                jti_key(token.get(api_settings.JTI_CLAIM)),
+                user_key(token.get(api_settings.USER_ID_CLAIM)),
+            )
+            if key in bloom
+        ]
+        if not keys:
+            return False
+
+        for key, revoked_before in self._confirm(keys).items():
+            if revoked_before is NOT_REVOKED:
+                continue
+            # A revoked jti has no cut-off, a revoked user every token
+            # issued before it
+            if revoked_before is None or issued_at(token) < revoked_before:
+                return True
+        return False
+
+
+revocation_list = RevocationList()
+
+
+def issued_at(token):
+    iat = token.get("iat")
+    if iat is None:
+        return token_expiry(token) - api_settings.ACCESS_TOKEN_LIFETIME
+    return datetime.fromtimestamp(iat, tz=dt_timezone.utc)
+
+
+def token_expiry(token):
+    return datetime.fromtimestamp(token["exp"], tz=dt_timezone.utc)
+
+
+def _store(revocations):
+    TokenRevocation.objects.bulk_create(
+        revocations,
+        update_conflicts=True,
+        unique_fields=["key"],
+        update_fields=["revoked_before", "expires_at", "updated_at"],
+    )
+    rows = {revocation.key: revocation.revoked_before for revocation in revocations}
+    transaction.on_commit(lambda: revocation_list.add(rows))
+
+
+def revoke_user_tokens(*user_ids):
+    """
+    Revoke every token issued to the given users so far. Tokens carry whole
+    seconds, so only tokens issued from the next second on (e.g. after
+    logging in again) stay valid.
+    """
+    now = timezone.now()
+    # No token issued before now can outlive this
+    expires_at = now + api_settings.ACCESS_TOKEN_LIFETIME
+    _store(
+        [
+            TokenRevocation(
+                key=user_key(user_id), revoked_before=now, expires_at=expires_at
+            )
+            for user_id in user_ids
+        ]
+    )
+
+
+def revoke_token(token):
+    _store(
+        [
+            TokenRevocation(
+                key=jti_key(token[api_settings.JTI_CLAIM]),
+                revoked_before=None,
+                expires_at=token_expiry(token),
+            )
+        ]
+    )
+
+
+def prune_token_revocations():
+    # Rows past their expiry only cover tokens that have expired anyway
+    deleted, _ = TokenRevocation.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
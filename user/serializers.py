@@ -1,4 +1,5 @@
 from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
 from django.core.validators import RegexValidator
 from django.contrib.auth.models import Permission, Group
@@ -7,6 +8,7 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
 from user.models import User
+from apps.permissions_api.services import get_group_ids, set_user_groups
 
 
 class GroupSerializer(serializers.ModelSerializer):
@@ -21,12 +23,16 @@ class PermissionSerializer(serializers.ModelSerializer):
         fields = ["codename", "name"]
 
 
+class GroupNamesField(serializers.ListField):
+    def to_representation(self, value):
+        return [group.name for group in value.all()]
+
+
 class UserSerializer(serializers.ModelSerializer):
     # groups = GroupSerializer(many=True)
     # user_permissions = PermissionSerializer(many=True)
-    groups = serializers.SlugRelatedField(
-        many=True, slug_field="name", queryset=Group.objects.all()
-    )
+    # Group names, checked all at once by validate_groups
+    groups = GroupNamesField(child=serializers.CharField())
     user_permissions = serializers.PrimaryKeyRelatedField(
         many=True, queryset=Permission.objects.all(), required=False
     )
@@ -108,24 +114,22 @@ class UserSerializer(serializers.ModelSerializer):
     # def create(self, validated_data):
     #     """Create and return a user with encrypted password."""
     #     return get_user_model().objects.create_user(**validated_data)
+    def validate_groups(self, value):
+        group_ids, missing = get_group_ids(value)
+        if missing:
+            raise serializers.ValidationError(
+                _("Groups not found: {}").format(", ".join(missing))
+            )
+        return group_ids
+
     def create(self, validated_data):
-        groups_data = validated_data.pop("groups", [])
-        permissions_data = validated_data.pop("user_permissions", [])
+        group_ids = validated_data.pop("groups", [])
         password = validated_data.pop("password", None)
+        if password:
+            validated_data["password"] = make_password(password)
         user = super().create(validated_data)
 
-        for group_data in groups_data:
-            group_name = group_data.name
-            group = Group.objects.get(name=group_name)
-            user.groups.add(group)
-
-        for permission_data in permissions_data:
-            permission_codename = permission_data.codename
-            permission = Permission.objects.get(codename=permission_codename)
-            user.user_permissions.add(permission)
-        if password:
-            user.set_password(password)
-            user.save()
+        set_user_groups(user.pk, group_ids)
         return user
 
     # def update(self, instance, validated_data):
@@ -139,23 +143,15 @@ class UserSerializer(serializers.ModelSerializer):
 
     #     return user
     def update(self, instance, validated_data):
-        groups_data = validated_data.pop("groups", [])
-        permissions_data = validated_data.pop("user_permissions", [])
+        # user_permissions is read only here, see AssignPermissionsToUserView
+        group_ids = validated_data.pop("groups", None)
         password = validated_data.pop("password", None)
+        if password:
+            instance.set_password(password)
         user = super().update(instance, validated_data)
 
-        user.groups.clear()  # Clear existing groups
-        for group_data in groups_data:
-            group_name = group_data.name
-            group = Group.objects.get(name=group_name)
-            user.groups.add(group)
-        user.user_permissions.clear()  # Clear existing permissions
-        for permission_data in permissions_data:
-            permission_codename = permission_data.codename
-            permission = Permission.objects.get(codename=permission_codename)
-        if password:
-            user.set_password(password)
-            user.save()
+        if group_ids is not None:
+            set_user_groups(user.pk, group_ids)
 
         return user
 
@@ -0,0 +1,85 @@
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.customer.models import Customer
+from music_sheet.authentication import invalidate_cached_user
+from user.models import User
+from user.permission_cache import (
+    bump_global_permission_version,
+    bump_user_permission_version,
+)
+from user.revocation import revoke_user_tokens
+
+# Changing any of these ends every session the user had
+CREDENTIAL_FIELDS = ("password", "is_active", "is_deleted")
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Customer)
+def invalidate_jwt_user_cache(sender, instance, **kwargs):
+    # Dropped after commit so a concurrent request cannot cache the old row again
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
+
+
+@receiver(post_save, sender=User)
+def bust_user_permission_cache(sender, instance, **kwargs):
+    # is_superuser and is_active decide what a user may do as well
+    user_id = instance.pk
+    transaction.on_commit(lambda: bump_user_permission_version(user_id))
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def bust_permission_cache_on_user_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        user_ids = [instance.pk]
+    elif pk_set:
+        # Changed from the group or permission side, e.g. group.user_set.add()
+        user_ids = list(pk_set)
+    else:
+        transaction.on_commit(bump_global_permission_version)
+        return
+    transaction.on_commit(lambda: bump_user_permission_version(*user_ids))
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def bust_global_permission_cache(sender, action="post_", **kwargs):
+    if action.startswith("post_"):
+        transaction.on_commit(bump_global_permission_version)
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Customer)
+def revoke_tokens_on_credential_change(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not set(update_fields) & set(CREDENTIAL_FIELDS):
+        return
+
+    previous = User.objects.filter(pk=instance.pk).values(*CREDENTIAL_FIELDS).first()
+    if previous is None:
+        return
+    if (
+        previous["password"] != instance.password
+        or (previous["is_active"] and not instance.is_active)
+        or (not previous["is_deleted"] and instance.is_deleted)
+    ):
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_tokens_on_delete(sender, instance, **kwargs):
+    # Deleting a customer deletes its user row as well
+    revoke_user_tokens(instance.pk)
@@ -12,6 +12,7 @@ from user.views import (
     UserUpdateView,
     UserDeleteView,
     LoginView,
+    LogoutView,
     UserDialogView,
     UserGenderDialogView,
     forgot_password,
@@ -22,6 +23,7 @@ app_name = "user"
 urlpatterns = [
     path("create_user/", CreateUserView.as_view(), name="create-user"),
     path("login/", LoginView.as_view(), name="login"),
+    path("logout/", LogoutView.as_view(), name="logout"),
     path("upload_photo/", UploadUserPhotoView.as_view(), name="upload-photo"),
     path("upload_cover/", UploadUserCoverView.as_view(), name="upload-cover"),
     path("me/", ManagerUserView.as_view(), name="me"),
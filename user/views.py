@@ -23,7 +23,7 @@ from rest_framework.decorators import action
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.parsers import JSONParser
 
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from music_sheet.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
 
 import uuid
@@ -47,6 +47,8 @@ from user.serializers import (
 )
 
 from user.filters import UserFilter
+from user.permission_cache import get_cached_permissions
+from user.revocation import revoke_token
 
 from music_sheet.pagination import StandardResultsSetPagination
 
@@ -87,10 +89,11 @@ class LoginView(APIView):
         refresh = RefreshToken.for_user(user)
         response = Response()
         # Extract group names and convert them to a list of strings
-        group_names = list(user.groups.values_list("name", flat=True))
-        user_permissions_names = list(
-            user.user_permissions.values_list("codename", flat=True)
-        )
+        permissions = get_cached_permissions(user)
+        group_names = permissions["groups"]
+        user_permissions_names = [
+            name.split(".", 1)[1] for name in permissions["user_permissions"]
+        ]
 
         response.data = {
             "identifier": (
@@ -106,6 +109,19 @@ class LoginView(APIView):
         return response
 
 
+class LogoutView(APIView):
+    # Revokes the access token the request was made with, staff and
+    # customers alike
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        revoke_token(request.auth)
+        return Response(
+            {"detail": _("Logged out successfully")}, status=status.HTTP_200_OK
+        )
+
+
 class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
     authentication_classes = [JWTAuthentication]
@@ -211,8 +227,8 @@ class UploadUserPhotoView(generics.UpdateAPIView):
         user = self.request.user  # Get the user from the JWT token
         serializer = self.get_serializer(user, data=request.data)
         if serializer.is_valid():
+            # User.save shrinks the photo and makes the avatar
             serializer.save()
-            user.resize_and_save_avatar()
             return Response(
                 {"detail": _("Your photo changed successfully")},
                 status=status.HTTP_200_OK,